@@ -7,7 +7,10 @@ import threading
 import json
 import subprocess
 import os
-from typing import List, Dict
+import fcntl
+import selectors
+import signal
+from typing import List, Dict, Optional
 
 # Настройка логирования
 logging.basicConfig(
@@ -40,6 +43,9 @@ class BoothController:
         self.session_active = False
         self.playback_process = None
         
+        # Сигнал остановки основного цикла
+        self._stop = threading.Event()
+        
         self.setup_event_handlers()
         
     def setup_event_handlers(self):
@@ -72,11 +78,10 @@ class BoothController:
         """Проверить валидность платежа"""
         try:
             # Уже проверено в QR сканере, но делаем дополнительную проверку
-            payment_id = payment_data.get('payment_id')
-            
-            # Проверяем наличие необходимых данных для воспроизведения
-            if payment_data.get('hero_names') and isinstance(payment_data.get('hero_names'), list):
-                logger.info(f"Valid payment data for heroes: {payment_data.get('hero_names')}")
+            # наличия необходимых данных для воспроизведения
+            hero_names = payment_data.get('hero_names')
+            if type(hero_names) is list and hero_names:
+                logger.info("Valid payment data for heroes: %s", hero_names)
                 return True
                 
             logger.warning("Invalid payment data structure")
@@ -131,17 +136,26 @@ class BoothController:
             self.playback_process = subprocess.Popen(
                 cmd,
                 stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
+                stderr=subprocess.STDOUT,
+                bufsize=0,
+                close_fds=True
             )
             
             logger.info("Playback module started")
             
+            # pidfd становится читаемым при завершении процесса,
+            # поэтому выход отслеживается тем же циклом, что и вывод
+            try:
+                pidfd = os.pidfd_open(self.playback_process.pid)
+            except (AttributeError, OSError):
+                pidfd = None
+            
             # Мониторим вывод процесса для дебага
-            self.monitor_playback_output()
+            self.monitor_playback_output(pidfd)
             
-            # Мониторим процесс воспроизведения
-            self.monitor_playback_process()
+            # Без pidfd мониторим процесс воспроизведения отдельным потоком
+            if pidfd is None:
+                self.monitor_playback_process()
             
         except Exception as e:
             logger.error(f"❌ Failed to start playback module: {e}")
@@ -150,24 +164,67 @@ class BoothController:
                 "timestamp": time.time()
             })
     
-    def monitor_playback_output(self):
-        """Мониторинг вывода playback процесса для дебага"""
+    def monitor_playback_output(self, pidfd: Optional[int] = None):
+        """Мониторинг вывода (и, при наличии pidfd, завершения) playback процесса"""
+        process = self.playback_process
+        
+        def _log_line(line: bytes):
+            text = line.decode('utf-8', 'replace').rstrip()
+            if text:
+                logger.info("PLAYBACK: %s", text)
+        
         def _monitor_output():
+            sel = selectors.DefaultSelector()
+            buf = bytearray()
+            exit_handled = False
             try:
-                while self.playback_process and self.playback_process.poll() is None:
-                    # Читаем stdout
-                    stdout_line = self.playback_process.stdout.readline()
-                    if stdout_line:
-                        logger.info(f"PLAYBACK: {stdout_line.strip()}")
-                    
-                    # Читаем stderr
-                    stderr_line = self.playback_process.stderr.readline()
-                    if stderr_line:
-                        print(self.playback_process.stderr.readlines())
-                        logger.error(f"PLAYBACK ERROR: {stderr_line.strip()}")
+                # stderr объединен с stdout, поэтому читаем один пайп
+                fd = process.stdout.fileno()
+                flags = fcntl.fcntl(fd, fcntl.F_GETFL)
+                fcntl.fcntl(fd, fcntl.F_SETFL, flags | os.O_NONBLOCK)
+                sel.register(fd, selectors.EVENT_READ, 'out')
+                
+                if pidfd is not None:
+                    sel.register(pidfd, selectors.EVENT_READ, 'exit')
+                
+                while sel.get_map():
+                    for key, _ in sel.select():
+                        if key.data == 'exit':
+                            # Процесс завершился - wait() вернется сразу
+                            sel.unregister(pidfd)
+                            exit_handled = True
+                            self._handle_playback_exit(process.wait())
+                            continue
+                        
+                        try:
+                            data = os.read(key.fd, 65536)
+                        except BlockingIOError:
+                            continue
+                        
+                        if not data:
+                            # EOF - дописываем хвост без перевода строки
+                            sel.unregister(key.fd)
+                            if buf:
+                                _log_line(buf)
+                            continue
+                        
+                        buf.extend(data)
+                        start = 0
+                        while (end := buf.find(b'\n', start)) != -1:
+                            _log_line(buf[start:end])
+                            start = end + 1
+                        del buf[:start]
                         
             except Exception as e:
                 logger.error(f"Playback output monitoring error: {e}")
+            finally:
+                sel.close()
+                if pidfd is not None:
+                    os.close(pidfd)
+                    if not exit_handled:
+                        # Цикл оборвался раньше завершения процесса - все равно дожидаемся его,
+                        # иначе кабинка не получит ни playback_finished, ни playback_error
+                        self._handle_playback_exit(process.wait())
         
         output_thread = threading.Thread(target=_monitor_output, daemon=True)
         output_thread.start()
@@ -177,20 +234,7 @@ class BoothController:
         def _monitor():
             try:
                 # Ждем завершения процесса воспроизведения
-                return_code = self.playback_process.wait()
-                
-                if return_code == 0:
-                    logger.info("✅ Playback process completed successfully")
-                    self.event_bus.publish("playback_finished", {
-                        "timestamp": time.time(),
-                        "session": self.current_session
-                    })
-                else:
-                    logger.error(f"❌ Playback process failed with code: {return_code}")
-                    self.event_bus.publish("playback_error", {
-                        "error": f"Process exit code: {return_code}",
-                        "timestamp": time.time()
-                    })
+                self._handle_playback_exit(self.playback_process.wait())
                     
             except Exception as e:
                 logger.error(f"Playback monitoring error: {e}")
@@ -199,6 +243,21 @@ class BoothController:
         monitor_thread = threading.Thread(target=_monitor, daemon=True)
         monitor_thread.start()
     
+    def _handle_playback_exit(self, return_code: int):
+        """Опубликовать результат завершения процесса воспроизведения"""
+        if return_code == 0:
+            logger.info("✅ Playback process completed successfully")
+            self.event_bus.publish("playback_finished", {
+                "timestamp": time.time(),
+                "session": self.current_session
+            })
+        else:
+            logger.error(f"❌ Playback process failed with code: {return_code}")
+            self.event_bus.publish("playback_error", {
+                "error": f"Process exit code: {return_code}",
+                "timestamp": time.time()
+            })
+    
     def on_playback_finished(self, data):
         """Обработка завершения воспроизведения"""
         logger.info("✅ Playback finished successfully")
@@ -235,11 +294,9 @@ class BoothController:
         self.current_session = None
         self.playback_process = None
         
-        # Даем небольшую задержку перед запуском сканирования
-        time.sleep(1)
-        
-        # Начинаем ожидание нового QR-кода
-        self.start_qr_scanning()
+        # Начинаем ожидание нового QR-кода после небольшой задержки,
+        # не занимая поток диспетчера событий
+        threading.Timer(1.0, self.start_qr_scanning).start()
     
     def start_qr_scanning(self):
         """Начать сканирование QR-кодов"""
@@ -257,6 +314,10 @@ class BoothController:
         """Запуск кабинки"""
         logger.info("Starting Booth System")
         
+        # SIGINT/SIGTERM только будят основной поток, завершение - в finally
+        signal.signal(signal.SIGINT, lambda *_: self._stop.set())
+        signal.signal(signal.SIGTERM, lambda *_: self._stop.set())
+        
         try:
             # Запускаем обработку событий
             event_bus_thread = threading.Thread(target=self.event_bus.start, daemon=True)
@@ -270,11 +331,9 @@ class BoothController:
             
             # Основной цикл
             logger.info("✅ Booth system ready. Waiting for QR codes...")
-            while True:
-                time.sleep(1)
+            self._stop.wait()
+            logger.info("Booth stop requested")
                 
-        except KeyboardInterrupt:
-            logger.info("Booth interrupted by user")
         except Exception as e:
             logger.error(f"Booth error: {e}")
         finally:
@@ -284,24 +343,34 @@ class BoothController:
         """Проверить наличие необходимых видеофайлов"""
         logger.info("🔍 Checking video files...")
         
+        # Один проход по media/ вместо отдельной проверки каждого пути
+        media_path = "media"
+        try:
+            with os.scandir(media_path) as it:
+                media_entries = {e.name: e for e in it}
+        except FileNotFoundError:
+            media_entries = {}
+        
         # Проверяем приветственное видео
         greeting_path = "media/greet_video.mp4"
-        if os.path.exists(greeting_path):
+        if "greet_video.mp4" in media_entries:
             logger.info(f"✅ Greeting video found: {greeting_path}")
         else:
             logger.warning(f"⚠️ Greeting video not found: {greeting_path}")
         
         # Проверяем завершающее видео
         ending_path = "media/end_video.mp4"
-        if os.path.exists(ending_path):
+        if "end_video.mp4" in media_entries:
             logger.info(f"✅ Ending video found: {ending_path}")
         else:
             logger.warning(f"⚠️ Ending video not found: {ending_path}")
         
         # Проверяем папку с видео героев
         heroes_path = "media/hero_videos"
-        if os.path.exists(heroes_path):
-            hero_count = len([f for f in os.listdir(heroes_path) if os.path.isdir(os.path.join(heroes_path, f))])
+        heroes_entry = media_entries.get("hero_videos")
+        if heroes_entry is not None and heroes_entry.is_dir():
+            with os.scandir(heroes_path) as it:
+                hero_count = sum(1 for e in it if e.is_dir())
             logger.info(f"✅ Hero videos folder found with {hero_count} heroes")
         else:
             logger.warning(f"⚠️ Hero videos folder not found: {heroes_path}")
@@ -309,6 +378,7 @@ class BoothController:
     def shutdown(self):
         """Корректное завершение"""
         logger.info("Shutting down booth...")
+        self._stop.set()
         
         # Останавливаем все процессы
         if self.playback_process and self.playback_process.poll() is None:
@@ -316,6 +386,7 @@ class BoothController:
         
         self.event_bus.stop()
         self.qr_scanner.stop_scanning()
+        self.media.close()
         self.gpio.cleanup()
 
 if __name__ == "__main__":
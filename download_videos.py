@@ -1,8 +1,11 @@
 # download_videos.py
 import os
+import shutil
+import tempfile
 import requests
 import zipfile
 import config
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import logging
 
@@ -13,6 +16,18 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Размер блока при копировании ответа сервера
+DOWNLOAD_CHUNK_SIZE = 1024 * 1024
+
+# Архивы меньше этого размера держим в памяти и качаем одним потоком
+ARCHIVE_SPOOL_SIZE = 64 * 1024 * 1024
+
+# Количество параллельных Range-запросов для больших архивов
+DOWNLOAD_RANGES = 8
+
+# Расширения видеофайлов
+VIDEO_EXTS = frozenset({'.mp4', '.avi', '.mov', '.mkv', '.webm'})
+
 def download_videos():
     """Основная функция для скачивания видео"""
     
@@ -34,32 +49,34 @@ def download_videos():
         
         # Проверяем статус ответа
         if response.status_code == 200:
-            # Сохраняем временный zip-файл
-            zip_path = f"temp_videos_{config.SUBCATEGORY_ID}.zip"
-            
-            with open(zip_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
-            
-            logger.info(f"ZIP-архив скачан: {zip_path}")
-            
-            # Распаковываем архив
-            with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-                # Создаем папку для видео, если её нет
-                os.makedirs(config.HERO_VIDEOS_DIR, exist_ok=True)
+            with _fetch_archive(url, headers, response) as zip_buffer:
+                zip_buffer.seek(0)
                 
-                # Извлекаем все файлы
-                zip_ref.extractall(config.HERO_VIDEOS_DIR)
+                logger.info("ZIP-архив скачан")
                 
-                # Логируем извлеченные файлы
-                for file_info in zip_ref.infolist():
-                    extracted_path = os.path.join(config.HERO_VIDEOS_DIR, file_info.filename)
-                    if os.path.isfile(extracted_path):
-                        logger.info(f"Извлечен: {extracted_path}")
-            
-            # Удаляем временный zip-файл
-            os.remove(zip_path)
-            logger.info(f"Временный файл {zip_path} удален")
+                # Распаковываем архив
+                with zipfile.ZipFile(zip_buffer, 'r') as zip_ref:
+                    # Создаем папку для видео, если её нет
+                    os.makedirs(config.HERO_VIDEOS_DIR, exist_ok=True)
+                    
+                    # Извлекаем файлы параллельно: ZipFile сам сериализует чтение из буфера,
+                    # а распаковка zlib и запись на диск отпускают GIL
+                    def _extract_member(member):
+                        try:
+                            zip_ref.extract(member, config.HERO_VIDEOS_DIR)
+                        except FileExistsError:
+                            # Родительскую папку одновременно создал другой поток
+                            zip_ref.extract(member, config.HERO_VIDEOS_DIR)
+                    
+                    members = zip_ref.infolist()
+                    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+                        list(executor.map(_extract_member, members))
+                    
+                    # Логируем извлеченные файлы одной записью, пофайлово - только в DEBUG
+                    logger.info("Извлечено %d файлов", len(members))
+                    if logger.isEnabledFor(logging.DEBUG):
+                        for file_info in members:
+                            logger.debug("Извлечен: %s", os.path.join(config.HERO_VIDEOS_DIR, file_info.filename))
             
             # Выводим статистику
             count_videos()
@@ -81,6 +98,59 @@ def download_videos():
     except Exception as e:
         logger.error(f"Произошла ошибка: {str(e)}")
 
+def _fetch_archive(url, headers, response):
+    """Скачать архив в буфер; большие архивы - параллельными Range-запросами"""
+    total_size = int(response.headers.get('Content-Length', 0))
+    use_ranges = (
+        response.headers.get('Accept-Ranges') == 'bytes'
+        and 'Content-Encoding' not in response.headers
+        and total_size > ARCHIVE_SPOOL_SIZE
+    )
+    
+    if not use_ranges:
+        # Буферизуем архив в памяти; на диск он уходит только если превысит порог
+        zip_buffer = tempfile.SpooledTemporaryFile(max_size=ARCHIVE_SPOOL_SIZE)
+        response.raw.decode_content = True
+        shutil.copyfileobj(response.raw, zip_buffer, length=DOWNLOAD_CHUNK_SIZE)
+        return zip_buffer
+    
+    # Исходный ответ больше не нужен - части архива скачиваются заново по диапазонам
+    response.close()
+    logger.info(f"Скачиваю архив ({total_size} байт) в {DOWNLOAD_RANGES} потоков")
+    
+    zip_buffer = tempfile.TemporaryFile()
+    fd = zip_buffer.fileno()
+    os.ftruncate(fd, total_size)
+    part_size = -(-total_size // DOWNLOAD_RANGES)
+    
+    def _fetch_range(start):
+        end = min(start + part_size, total_size) - 1
+        range_headers = dict(headers, Range=f'bytes={start}-{end}')
+        with requests.get(url, headers=range_headers, stream=True, timeout=300) as part:
+            if part.status_code != 206:
+                raise requests.exceptions.HTTPError(
+                    f"Сервер не вернул диапазон {start}-{end}: {part.status_code}"
+                )
+            offset = start
+            for chunk in part.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                if offset + len(chunk) > end + 1:
+                    # Лишние байты затерли бы соседнюю часть архива
+                    raise IOError(f"Диапазон {start}-{end}: сервер прислал больше данных")
+                os.pwrite(fd, chunk, offset)
+                offset += len(chunk)
+            if offset != end + 1:
+                # Оборванная часть оставила бы в архиве нули из ftruncate
+                raise IOError(f"Диапазон {start}-{end}: получено {offset - start} из {end - start + 1} байт")
+    
+    try:
+        with ThreadPoolExecutor(max_workers=DOWNLOAD_RANGES) as executor:
+            list(executor.map(_fetch_range, range(0, total_size, part_size)))
+    except Exception:
+        zip_buffer.close()
+        raise
+    
+    return zip_buffer
+
 def count_videos():
     """Подсчитывает количество скачанных видео и выводит статистику"""
     try:
@@ -89,17 +159,18 @@ def count_videos():
         
         # Проверяем существование директории
         if os.path.exists(config.HERO_VIDEOS_DIR):
-            # Проходим по всем подпапкам
-            for hero_dir in os.listdir(config.HERO_VIDEOS_DIR):
-                hero_path = os.path.join(config.HERO_VIDEOS_DIR, hero_dir)
-                
-                if os.path.isdir(hero_path):
+            # Проходим по всем подпапкам (тип берется из dirent, без лишних stat)
+            with os.scandir(config.HERO_VIDEOS_DIR) as heroes_it:
+                for hero_entry in heroes_it:
+                    if not hero_entry.is_dir():
+                        continue
+                    
                     # Считаем видеофайлы в папке героя
-                    video_files = [f for f in os.listdir(hero_path) 
-                                  if f.lower().endswith(('.mp4', '.avi', '.mov', '.mkv', '.webm'))]
+                    with os.scandir(hero_entry.path) as files_it:
+                        count = sum(1 for e in files_it
+                                    if e.is_file() and os.path.splitext(e.name)[1].lower() in VIDEO_EXTS)
                     
-                    count = len(video_files)
-                    hero_stats[hero_dir] = count
+                    hero_stats[hero_entry.name] = count
                     total_files += count
         
         # Выводим статистику
@@ -125,7 +196,7 @@ def list_video_files():
         if os.path.exists(config.HERO_VIDEOS_DIR):
             for root, dirs, files in os.walk(config.HERO_VIDEOS_DIR):
                 for file in files:
-                    if file.lower().endswith(('.mp4', '.avi', '.mov', '.mkv', '.webm')):
+                    if os.path.splitext(file)[1].lower() in VIDEO_EXTS:
                         file_path = os.path.join(root, file)
                         relative_path = os.path.relpath(file_path, config.HERO_VIDEOS_DIR)
                         file_size = os.path.getsize(file_path) / (1024 * 1024)  # В МБ
@@ -1,52 +1,128 @@
-import multiprocessing
-import queue
+import os
+import selectors
+import threading
 import time
-from typing import Any, Callable, Dict, List
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Tuple
 import logging
 
 logger = logging.getLogger(__name__)
 
 class EventBus:
-    """Шина событий для межпроцессного взаимодействия"""
+    """Шина событий для взаимодействия модулей внутри процесса"""
     
     def __init__(self):
-        self._event_queue = multiprocessing.Queue()
-        self._subscribers: Dict[str, List[Callable]] = {}
-        self._running = multiprocessing.Event()
+        # Все подписчики живут в этом же процессе - межпроцессная очередь не нужна.
+        # eventfd будит диспетчер только когда в очереди есть события
+        self._event_queue = deque()
+        self._event_queue_lock = threading.Lock()
+        self._wakeup_fd = os.eventfd(0, os.EFD_CLOEXEC | os.EFD_NONBLOCK)
+        # Защищает eventfd от закрытия во время записи и флаг работающего диспетчера
+        self._state_lock = threading.Lock()
+        self._dispatching = False
+        # Copy-on-write: подписка заменяет кортеж целиком, диспетчер читает снимок без блокировки
+        self._subscribers: Dict[str, Tuple[Callable, ...]] = {}
+        self._subscribers_lock = threading.Lock()
+        self._running = threading.Event()
+        # Хендлеры выполняются в пуле, чтобы медленный обработчик не блокировал шину
+        self._pool = ThreadPoolExecutor(
+            max_workers=max(4, (os.cpu_count() or 1) * 2),
+            thread_name_prefix='ebus'
+        )
         
     def subscribe(self, event_type: str, callback: Callable):
         """Подписаться на событие"""
-        if event_type not in self._subscribers:
-            self._subscribers[event_type] = []
-        self._subscribers[event_type].append(callback)
-        logger.info(f"Подписан на {event_type}")
+        with self._subscribers_lock:
+            self._subscribers[event_type] = self._subscribers.get(event_type, ()) + (callback,)
+        logger.info("Подписан на %s", event_type)
         
     def unsubscribe(self, event_type: str, callback: Callable):
         """Отписаться от события"""
-        if event_type in self._subscribers:
-            if callback in self._subscribers[event_type]:
-                self._subscribers[event_type].remove(callback)
+        with self._subscribers_lock:
+            callbacks = self._subscribers.get(event_type, ())
+            try:
+                i = callbacks.index(callback)
+            except ValueError:
+                return
+            self._subscribers[event_type] = callbacks[:i] + callbacks[i + 1:]
                 
     def publish(self, event_type: str, data: Any = None):
         """Опубликовать событие"""
-        logger.info(f"Опубликовано событие: {event_type}. Данные: {data}")
-        self._event_queue.put((event_type, data))
+        # repr(data) строится только если запись действительно будет выведена
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("Опубликовано событие: %s. Данные: %s", event_type, data)
+        with self._event_queue_lock:
+            self._event_queue.append((event_type, data))
+        self._wake()
+        
+    def _wake(self):
+        """Разбудить диспетчер (после остановки шины eventfd уже закрыт - будить некого)"""
+        with self._state_lock:
+            if self._wakeup_fd is not None:
+                os.eventfd_write(self._wakeup_fd, 1)
         
     def start(self):
         """Запустить обработку событий"""
-        self._running.set()
-        while self._running.is_set():
-            try:
-                event_type, data = self._event_queue.get(timeout=1.0)
-                if event_type in self._subscribers:
-                    for callback in self._subscribers[event_type]:
-                        try:
-                            callback(data)
-                        except Exception as e:
-                            logger.error(f"Ошибка в хендлере события: {e}")
-            except queue.Empty:
-                continue
+        with self._state_lock:
+            fd = self._wakeup_fd
+            if fd is None:
+                logger.warning("Шина событий уже остановлена")
+                return
+            self._dispatching = True
+            self._running.set()
+        
+        try:
+            with selectors.DefaultSelector() as sel:
+                sel.register(fd, selectors.EVENT_READ)
+                while self._running.is_set():
+                    sel.select()
+                    try:
+                        os.eventfd_read(fd)
+                    except BlockingIOError:
+                        continue
+                    
+                    # Забираем все накопившиеся события одной пачкой
+                    with self._event_queue_lock:
+                        batch = list(self._event_queue)
+                        self._event_queue.clear()
+                    
+                    for i, (event_type, data) in enumerate(batch):
+                        if not self._running.is_set():
+                            logger.debug("Шина остановлена, не разослано событий: %d", len(batch) - i)
+                            break
+                        for callback in self._subscribers.get(event_type, ()):
+                            self._pool.submit(self._safe_call, callback, data)
+        finally:
+            # Пул и eventfd закрываются только здесь, когда диспетчер больше ничего не отправит
+            with self._state_lock:
+                self._dispatching = False
+            self._close()
+                
+    def _safe_call(self, callback: Callable, data: Any):
+        """Вызвать хендлер, не давая исключению уронить поток пула"""
+        try:
+            callback(data)
+        except Exception as e:
+            logger.error("Ошибка в хендлере события: %s", e)
                 
     def stop(self):
         """Остановить обработку событий"""
-        self._running.clear()
+        with self._state_lock:
+            self._running.clear()
+            dispatching = self._dispatching
+            if dispatching:
+                # Будим диспетчер, чтобы он сразу увидел остановку и сам закрыл ресурсы
+                os.eventfd_write(self._wakeup_fd, 1)
+        
+        if not dispatching:
+            # Диспетчер не запущен (или уже вышел) - закрываем ресурсы сами
+            self._close()
+        
+    def _close(self):
+        """Остановить пул хендлеров и закрыть eventfd (повторный вызов ничего не делает)"""
+        self._pool.shutdown(wait=False)
+        with self._state_lock:
+            if self._wakeup_fd is not None:
+                os.close(self._wakeup_fd)
+                self._wakeup_fd = None
@@ -46,10 +46,12 @@ class GPIOManager:
         self.session_active = False
         logger.info("Сессия активна: %s", self.session_active)
         
-        # Даем пользователю время выйти
+        # Даем пользователю время выйти, не занимая поток диспетчера событий
         logger.info("Ожидаем 3 секунды перед проверкой движения")
-        time.sleep(3)
+        threading.Timer(3.0, self._cleanup_after_exit).start()
         
+    def _cleanup_after_exit(self):
+        """Очистка кабинки после ожидания выхода пользователя"""
         # В режиме заглушки всегда считаем что движения нет
         # и сразу очищаем кабинку
         logger.info("Режим заглушки: движение не проверяется, очищаем кабинку")
@@ -1,20 +1,47 @@
 
+import asyncio
 import os
+import shutil
 import requests
 import logging
-import urllib.request
-from typing import Dict, List
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
 from config import HERO_VIDEOS_PATH
 
 logger = logging.getLogger(__name__)
 
+# Замена недопустимых для файловой системы символов в имени героя
+_INVALID_TRANS = str.maketrans({c: '_' for c in '<>:"/\\|?*'})
+
+# Видео крупнее этого размера качаются несколькими параллельными Range-запросами
+RANGED_DOWNLOAD_MIN_SIZE = 16 * 1024 * 1024
+VIDEO_DOWNLOAD_RANGES = 4
+
 class MediaManager:
     """Менеджер медиа-файлов"""
     
-    def __init__(self):
+    def __init__(self, max_download_workers: int = 8):
         self.base_path = HERO_VIDEOS_PATH
+        # Ограничение параллельных скачиваний, чтобы не перегружать сервер
+        self.max_download_workers = max_download_workers
+        # Кэш списков mp4 по папкам героев: путь -> (mtime_ns папки, отсортированные имена)
+        self._dir_cache: Dict[str, Tuple[int, List[str]]] = {}
+        # Имя героя -> путь к его папке
+        self._hero_dir_cache: Dict[str, str] = {}
         self._ensure_directories()
         
+        # Общая сессия с пулом соединений: keep-alive вместо нового handshake на каждое видео
+        self._session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=max(16, max_download_workers * VIDEO_DOWNLOAD_RANGES),
+            max_retries=Retry(total=3, backoff_factor=0.3)
+        )
+        self._session.mount('http://', adapter)
+        self._session.mount('https://', adapter)
+        
     def _ensure_directories(self):
         """Создать базовую директорию"""
         os.makedirs(self.base_path, exist_ok=True)
@@ -35,48 +62,112 @@ class MediaManager:
             total_skipped = 0
             total_failed = 0
             
+            # Собираем задачи на скачивание: (имя героя, данные видео, папка героя, есть ли локальный файл)
+            tasks = []
+            # Содержимое папок с исходниками на сервере: одно чтение папки вместо stat на каждый файл
+            server_dir_listings: Dict[str, set] = {}
+            
+            # Существующие папки героев - одним чтением базовой папки
+            with os.scandir(self.base_path) as it:
+                existing_dirs = {e.name for e in it if e.is_dir()}
+            
             for hero_name in hero_names:
-                clean_hero_name = self._clean_filename(hero_name)
-                hero_dir = os.path.join(self.base_path, clean_hero_name)
-                os.makedirs(hero_dir, exist_ok=True)
+                hero_dir = self._hero_dir(hero_name)
+                hero_dir_name = os.path.basename(hero_dir)
+                if hero_dir_name not in existing_dirs:
+                    os.makedirs(hero_dir, exist_ok=True)
+                    existing_dirs.add(hero_dir_name)
                 
-                logger.info(f"Обработка героев: {hero_name} -> {hero_dir}")
+                logger.info("Обработка героев: %s -> %s", hero_name, hero_dir)
                 
                 video_infos = heroes_videos_data.get(hero_name, [])
-                logger.info(f"Найдено {len(video_infos)} видео для {hero_name}")
+                logger.info("Найдено %d видео для %s", len(video_infos), hero_name)
+                
+                # Уже скачанные видео героя - одним чтением папки вместо stat на каждый файл
+                existing_files = set(self._list_mp4(hero_dir))
                 
                 for video_info in video_infos:
+                    filename = f"{video_info.get('hero_name', 'unknown')}_{video_info.get('id')}.mp4"
+                    if filename in existing_files:
+                        total_skipped += 1
+                        continue
+                    
                     # Проверяем существование файла на сервере
                     if not video_info.get('exists', False):
-                        logger.warning(f"Файл не существует {video_info.get('file_path')}")
+                        logger.warning("Файл не существует %s", video_info.get('file_path'))
                         total_failed += 1
                         continue
                     
-                    success = self._download_single_video(video_info, hero_dir, video_info.get('id', 0))
-                    if success:
-                        total_downloaded += 1
-                        logger.info(f"Successfully downloaded video for {hero_name}")
-                    else:
-                        total_failed += 1
-                        logger.error(f"Failed to download video for {hero_name}")
+                    server_file_exists = self._server_file_exists(
+                        video_info.get('file_path'), server_dir_listings
+                    )
+                    tasks.append((hero_name, video_info, hero_dir, server_file_exists))
+            
+            # Скачивания независимы и упираются в сеть - выполняем их параллельно
+            def _download(task):
+                _, video_info, hero_dir, server_file_exists = task
+                return self._download_single_video(
+                    video_info, hero_dir, video_info.get('id', 0), server_file_exists
+                )
+            
+            with ThreadPoolExecutor(max_workers=self.max_download_workers) as executor:
+                results = list(executor.map(_download, tasks))
+            
+            for (hero_name, video_info, hero_dir, _), success in zip(tasks, results):
+                if success:
+                    total_downloaded += 1
+                    logger.debug("Successfully downloaded video for %s", hero_name)
+                else:
+                    total_failed += 1
+                    logger.error("Failed to download video for %s", hero_name)
             
             logger.info(f"Download summary: {total_downloaded} downloaded, {total_skipped} skipped, {total_failed} failed")
-            return total_downloaded > 0
+            return total_downloaded + total_skipped > 0
             
         except Exception as e:
             logger.error(f"Video download failed: {e}")
             return False
                 
-    def _clean_filename(self, name: str) -> str:
+    async def download_videos_async(self, heroes_data: Dict) -> bool:
+        """
+        Асинхронный вариант download_videos для вызова из event loop.
+        Скачивание идет в общем пуле потоков и не блокирует цикл событий
+        """
+        return await asyncio.to_thread(self.download_videos, heroes_data)
+                
+    def _clean_filename(self, name: str, _trans=_INVALID_TRANS) -> str:
         """Очистить имя от недопустимых символов для файловой системы"""
-        invalid_chars = '<>:"/\\|?*'
-        for char in invalid_chars:
-            name = name.replace(char, '_')
-        return name.strip()
+        # Таблица привязана как аргумент по умолчанию - локальная переменная вместо глобальной
+        return name.translate(_trans).strip()
+        
+    def _hero_dir(self, hero_name: str) -> str:
+        """Путь к папке героя (вычисляется один раз на имя)"""
+        hero_dir = self._hero_dir_cache.get(hero_name)
+        if hero_dir is None:
+            hero_dir = os.path.join(self.base_path, self._clean_filename(hero_name))
+            self._hero_dir_cache[hero_name] = hero_dir
+        return hero_dir
             
     
 
-    def _download_single_video(self, video_info: Dict, target_dir: str, index: int) -> bool:
+    def _server_file_exists(self, server_file_path: Optional[str], listings: Dict[str, set]) -> bool:
+        """Проверить наличие серверного файла по содержимому его папки (папка читается один раз)"""
+        if not server_file_path:
+            return False
+        
+        directory, name = os.path.split(server_file_path)
+        names = listings.get(directory)
+        if names is None:
+            try:
+                with os.scandir(directory or '.') as it:
+                    names = {e.name for e in it}
+            except OSError:
+                names = set()
+            listings[directory] = names
+        return name in names
+
+    def _download_single_video(self, video_info: Dict, target_dir: str, index: int,
+                               server_file_exists: Optional[bool] = None) -> bool:
         """Скачать одно видео - используем реальные файловые пути"""
         try:
             # Используем ID записи как имя файла
@@ -84,10 +175,13 @@ class MediaManager:
             hero_name = video_info.get('hero_name', 'unknown')
             filename = f"{hero_name}_{record_id}.mp4"
             filepath = os.path.join(target_dir, filename)
+            # Данные пишутся во временный .part и переименовываются только после полной записи,
+            # поэтому недокачанный файл никогда не попадает под проверку существования
+            part_path = filepath + '.part'
             
             # Если видео уже существует, пропускаем скачивание
             if os.path.exists(filepath):
-                logger.info(f"Видео существует: {filepath}")
+                logger.debug("Видео существует: %s", filepath)
                 return True
             
             # Пробуем разные способы получить видео
@@ -95,18 +189,28 @@ class MediaManager:
             
             # Способ 1: Используем реальный файловый путь с сервера Django
             server_file_path = video_info.get('file_path')
-            if server_file_path and os.path.exists(server_file_path):
-                logger.info(f"Серверный путь: {server_file_path}")
+            if server_file_exists is None:
+                server_file_exists = bool(server_file_path) and os.path.exists(server_file_path)
+            if server_file_exists:
+                logger.debug("Серверный путь: %s", server_file_path)
                 try:
-                    import shutil
-                    shutil.copy2(server_file_path, filepath)
-                    if os.path.exists(filepath) and os.path.getsize(filepath) > 0:
-                        logger.info(f"Успешно скопировано: {filename} ({os.path.getsize(filepath)} байт)")
+                    self._copy_file(server_file_path, part_path)
+                    file_size = self._file_size(part_path)
+                    if file_size > 0:
+                        os.replace(part_path, filepath)
+                        logger.info("Успешно скопировано: %s (%d байт)", filename, file_size)
                         success = True
                     else:
-                        logger.error(f"Файл пустой: {filepath}")
+                        logger.error("Файл пустой: %s", filepath)
                 except Exception as copy_error:
-                    logger.error(f"Ошибка копирования: {copy_error}")
+                    logger.error("Ошибка копирования: %s", copy_error)
+                
+                if not success:
+                    # Обрывок копии нельзя докачивать по URL - удаляем его
+                    try:
+                        os.remove(part_path)
+                    except FileNotFoundError:
+                        pass
             
             # Способ 2: Если файловый путь не сработал, пробуем скачать по URL
             if not success:
@@ -117,53 +221,254 @@ class MediaManager:
                         base_url = 'http://127.0.0.1:8000'  # Используем локальный адрес Django
                         video_url = base_url + video_url
                     
-                    logger.info(f"Downloading from URL: {video_url}")
-                    logger.info(f"Saving to: {filepath}")
+                    logger.debug("Downloading from URL: %s", video_url)
+                    logger.debug("Saving to: %s", filepath)
                     
                     try:
-                        import urllib.request
-                        urllib.request.urlretrieve(video_url, filepath)
+                        self._fetch_url(video_url, part_path)
                         
                         # Проверяем что файл скачан
-                        if os.path.exists(filepath) and os.path.getsize(filepath) > 0:
-                            logger.info(f"Успешно скачано: {filename} ({os.path.getsize(filepath)} bytes)")
+                        file_size = self._file_size(part_path)
+                        if file_size > 0:
+                            os.replace(part_path, filepath)
+                            logger.info("Успешно скачано: %s (%d bytes)", filename, file_size)
                             success = True
                         else:
-                            logger.error(f"Файл пустой: {filepath}")
+                            logger.error("Файл пустой: %s", filepath)
                     except Exception as download_error:
-                        logger.error(f"Ошибка скачивания: {download_error}")
+                        logger.error("Ошибка скачивания: %s", download_error)
             
             if not success:
-                logger.error(f"Не удалось скачать {hero_name} видео {record_id}")
+                logger.error("Не удалось скачать %s видео %s", hero_name, record_id)
                 
             return success
             
         except Exception as e:
-            logger.error(f"Ошибка скачивания видео {video_info.get('id')}: {e}")
+            logger.error("Ошибка скачивания видео %s: %s", video_info.get('id'), e)
             return False
                 
+    def _fetch_url(self, video_url: str, filepath: str):
+        """
+        Скачать файл по URL; крупные файлы - параллельными Range-запросами.
+        Если в filepath остался обрывок прошлой попытки, докачиваем его с места обрыва,
+        но только если файл на сервере не изменился (If-Range с сохраненным валидатором)
+        """
+        validator_path = filepath + '.validator'
+        head = self._session.head(
+            video_url, headers={'Accept-Encoding': 'identity'},
+            allow_redirects=True, timeout=(5, 30)
+        )
+        total_size = int(head.headers.get('Content-Length', 0))
+        if (head.ok
+                and head.headers.get('Accept-Ranges') == 'bytes'
+                and total_size >= RANGED_DOWNLOAD_MIN_SIZE
+                and self._fetch_ranges(video_url, filepath, total_size, self._validator(head))):
+            self._remove(validator_path)
+            return
+        
+        # Докачивать можно только обрывок, для которого известен валидатор версии файла
+        offset = self._file_size(filepath)
+        validator = self._read_validator(validator_path) if offset else None
+        headers = {'Accept-Encoding': 'identity'}
+        if validator:
+            headers['Range'] = f'bytes={offset}-'
+            headers['If-Range'] = validator
+        
+        with self._session.get(video_url, headers=headers, stream=True, timeout=(5, 30)) as response:
+            if response.status_code == 416:
+                # Обрывок не соответствует файлу на сервере - следующая попытка начнет заново
+                self._remove(filepath)
+                self._remove(validator_path)
+            response.raise_for_status()
+            
+            # 200 вместо 206 - файл изменился или сервер не умеет Range: качаем с нуля
+            resume = validator is not None and response.status_code == 206
+            if resume and not response.headers.get('Content-Range', '').startswith(f'bytes {offset}-'):
+                raise IOError(f"Сервер вернул неожиданный диапазон: {response.headers.get('Content-Range')}")
+            
+            # Размер можно сверить, только если тело пришло без сжатия
+            length = response.headers.get('Content-Length')
+            expected_size = None
+            if length is not None and 'Content-Encoding' not in response.headers:
+                expected_size = (offset if resume else 0) + int(length)
+            
+            # Валидатор сохраняется до записи данных, чтобы обрыв можно было докачать
+            new_validator = self._validator(response)
+            if new_validator:
+                with open(validator_path, 'w') as vf:
+                    vf.write(new_validator)
+            else:
+                self._remove(validator_path)
+            
+            response.raw.decode_content = True
+            with open(filepath, 'ab' if resume else 'wb') as f:
+                shutil.copyfileobj(response.raw, f, length=1024 * 1024)
+                f.flush()
+                os.fsync(f.fileno())
+                size = f.tell()
+        
+        if expected_size is not None and size != expected_size:
+            if size > expected_size:
+                # Лишние байты - обрывок испорчен, докачивать его нельзя
+                self._remove(filepath)
+                self._remove(validator_path)
+            raise IOError(f"Размер {size} не совпадает с ожидаемым {expected_size}")
+        
+        self._remove(validator_path)
+    
+    @staticmethod
+    def _validator(response) -> Optional[str]:
+        """Валидатор версии файла для If-Range: сильный ETag или Last-Modified"""
+        etag = response.headers.get('ETag')
+        if etag and not etag.startswith('W/'):
+            return etag
+        return response.headers.get('Last-Modified')
+    
+    @staticmethod
+    def _read_validator(validator_path: str) -> Optional[str]:
+        """Прочитать сохраненный рядом с .part валидатор; None если его нет"""
+        try:
+            with open(validator_path) as vf:
+                return vf.read().strip() or None
+        except FileNotFoundError:
+            return None
+    
+    @staticmethod
+    def _remove(path: str):
+        """Удалить файл, если он есть"""
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+                
+    def _fetch_ranges(self, video_url: str, filepath: str, total_size: int,
+                      validator: Optional[str] = None) -> bool:
+        """
+        Скачать файл частями в заранее выделенный файл.
+        Возвращает False, если сервер не отдал диапазон (200 вместо 206) -
+        в том числе если файл изменился между запросами (If-Range)
+        """
+        part_size = -(-total_size // VIDEO_DOWNLOAD_RANGES)
+        
+        with open(filepath, 'wb') as f:
+            fd = f.fileno()
+            # Выделяем место сразу, чтобы файл не фрагментировался при записи вразнобой
+            try:
+                os.posix_fallocate(fd, 0, total_size)
+            except (AttributeError, OSError):
+                os.ftruncate(fd, total_size)
+            
+            def _fetch_range(start):
+                end = min(start + part_size, total_size) - 1
+                headers = {'Range': f'bytes={start}-{end}', 'Accept-Encoding': 'identity'}
+                if validator:
+                    headers['If-Range'] = validator
+                with self._session.get(video_url, headers=headers, stream=True, timeout=(5, 30)) as response:
+                    if response.status_code != 206:
+                        return False
+                    offset = start
+                    for chunk in response.iter_content(chunk_size=1024 * 1024):
+                        os.pwrite(fd, chunk, offset)
+                        offset += len(chunk)
+                    return offset == end + 1
+            
+            # Отдельный пул: задачи внешнего пула скачиваний не должны ждать свободных в нем же потоков
+            try:
+                with ThreadPoolExecutor(max_workers=VIDEO_DOWNLOAD_RANGES) as executor:
+                    done = all(list(executor.map(_fetch_range, range(0, total_size, part_size))))
+            except Exception:
+                done = False
+            
+            if not done:
+                # Файл с дырами нельзя докачивать с конца - обнуляем его
+                os.ftruncate(fd, 0)
+                return False
+            
+            os.fsync(fd)
+            return True
+                
+    def _file_size(self, filepath: str) -> int:
+        """Размер файла одним stat; 0 если файла нет"""
+        try:
+            return os.stat(filepath).st_size
+        except FileNotFoundError:
+            return 0
+                
+    def _copy_file(self, src_path: str, dst_path: str):
+        """Скопировать файл силами ядра (copy_file_range), без прокачки данных через Python"""
+        with open(src_path, 'rb', buffering=0) as src, open(dst_path, 'wb', buffering=0) as dst:
+            remaining = os.fstat(src.fileno()).st_size
+            
+            # Подсказываем ядру, что файл читается последовательно - оно читает вперед
+            if hasattr(os, 'posix_fadvise'):
+                os.posix_fadvise(src.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+            
+            try:
+                while remaining > 0:
+                    copied = os.copy_file_range(src.fileno(), dst.fileno(), remaining)
+                    if copied == 0:
+                        break
+                    remaining -= copied
+            except (AttributeError, OSError):
+                # Нет copy_file_range или ФС его не поддерживает (например, между разными ФС
+                # на старых ядрах) - пробуем sendfile, он тоже копирует внутри ядра
+                if not self._sendfile(src.fileno(), dst.fileno()):
+                    src.seek(0)
+                    dst.seek(0)
+                    dst.truncate()
+                    shutil.copyfileobj(src, dst, 4 * 1024 * 1024)
+            
+            os.fsync(dst.fileno())
+                
+    def _sendfile(self, src_fd: int, dst_fd: int) -> bool:
+        """Скопировать файл через os.sendfile с начала; False - если sendfile недоступен"""
+        size = os.fstat(src_fd).st_size
+        sent = 0
+        try:
+            os.ftruncate(dst_fd, 0)
+            os.lseek(dst_fd, 0, os.SEEK_SET)
+            while sent < size:
+                n = os.sendfile(dst_fd, src_fd, sent, size - sent)
+                if n == 0:
+                    break
+                sent += n
+        except (AttributeError, OSError):
+            return False
+        return True
+                
+    def _list_mp4(self, hero_dir: str) -> List[str]:
+        """Отсортированный список mp4 в папке героя; перечитывается только при изменении mtime папки"""
+        try:
+            mtime = os.stat(hero_dir).st_mtime_ns
+        except FileNotFoundError:
+            return []
+        
+        cached = self._dir_cache.get(hero_dir)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        
+        with os.scandir(hero_dir) as it:
+            # is_file берет тип из dirent, папки и прочие записи отсекаются без stat
+            video_files = sorted(e.name for e in it
+                                 if e.name[-4:] == '.mp4' and e.is_file(follow_symlinks=False))
+        self._dir_cache[hero_dir] = (mtime, video_files)
+        return video_files
+        
     def get_video_path(self, hero_name: str, video_index: int) -> str:
         """Получить путь к видеофайлу по имени героя и индексу видео"""
-        clean_hero_name = self._clean_filename(hero_name)
-        hero_dir = os.path.join(self.base_path, clean_hero_name)
+        hero_dir = self._hero_dir(hero_name)
         
-        # Ищем все mp4 файлы в папке героя
-        if os.path.exists(hero_dir):
-            video_files = [f for f in os.listdir(hero_dir) if f.endswith('.mp4')]
-            video_files.sort()  # Сортируем для consistency
-            
-            if video_index < len(video_files):
-                return os.path.join(hero_dir, video_files[video_index])
+        # Берем отсортированный список mp4 героя из кэша папки
+        video_files = self._list_mp4(hero_dir)
+        if video_index < len(video_files):
+            return os.path.join(hero_dir, video_files[video_index])
         
         return None
         
     def get_hero_video_count(self, hero_name: str) -> int:
         """Получить количество видео для героя"""
-        clean_hero_name = self._clean_filename(hero_name)
-        hero_dir = os.path.join(self.base_path, clean_hero_name)
-        if os.path.exists(hero_dir):
-            return len([f for f in os.listdir(hero_dir) if f.endswith('.mp4')])
-        return 0
+        hero_dir = self._hero_dir(hero_name)
+        return len(self._list_mp4(hero_dir))
         
     def get_all_hero_videos(self) -> Dict[str, List[str]]:
         """Получить все видео для всех героев"""
@@ -172,14 +477,14 @@ class MediaManager:
         if not os.path.exists(self.base_path):
             return result
             
-        for hero_dir in os.listdir(self.base_path):
-            hero_path = os.path.join(self.base_path, hero_dir)
-            if os.path.isdir(hero_path):
-                video_files = []
-                for file in os.listdir(hero_path):
-                    if file.endswith('.mp4'):
-                        video_files.append(os.path.join(hero_path, file))
-                video_files.sort()
-                result[hero_dir] = video_files
+        # Тип записи берется из dirent, без отдельного stat на каждую папку
+        with os.scandir(self.base_path) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    result[entry.name] = [os.path.join(entry.path, f) for f in self._list_mp4(entry.path)]
                 
         return result
+    
+    def close(self):
+        """Закрыть HTTP-сессию"""
+        self._session.close()
@@ -1,18 +1,27 @@
 # modules/playback_module.py
 import time
+import atexit
 import logging
+from logging.handlers import MemoryHandler
 import sys
 import os
+import io
 import json
+import uuid
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import tempfile
 import threading
 import subprocess
+import shutil
+import signal
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 import tkinter as tk
 from tkinter import ttk, font
-import traceback
 from pathlib import Path
+import numpy as np
 import pyaudio
 import wave
 
@@ -22,6 +31,14 @@ import wave
 # ==========================
 RECORD_DURATION_SECONDS = 10  # ЕДИНСТВЕННЫЙ параметр для управления временем записи
 
+# ==========================
+# ПЕРЕХОДНЫЕ ВИДЕО
+# ==========================
+# Пути строятся один раз от корня проекта, а не от текущей директории процесса
+MEDIA_DIR = Path(__file__).resolve().parent.parent / 'media'
+GREETING_VIDEO = MEDIA_DIR / 'greet_video.mp4'
+ENDING_VIDEO = MEDIA_DIR / 'end_video.mp4'
+
 # Добавляем путь к корневой директории для импортов
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
@@ -51,9 +68,13 @@ file_handler = logging.FileHandler(log_file, mode='w', encoding='utf-8')
 file_handler.setLevel(logging.DEBUG)
 file_handler.setFormatter(formatter)
 
+# Записи в файл копятся в памяти и сбрасываются пачкой (или сразу при WARNING и выше)
+memory_handler = MemoryHandler(capacity=256, flushLevel=logging.WARNING, target=file_handler)
+atexit.register(memory_handler.flush)
+
 # Добавляем обработчики
 logger.addHandler(console_handler)
-logger.addHandler(file_handler)
+logger.addHandler(memory_handler)
 
 logger.info("=" * 80)
 logger.info("🚀 МОДУЛЬ ВОСПРОИЗВЕДЕНИЯ ЗАПУЩЕН (ОБНОВЛЕННАЯ ВЕРСИЯ)")
@@ -64,79 +85,273 @@ logger.info(f"📁 Директория с видео: {HERO_VIDEOS_DIR}")
 logger.info(f"📁 Текущая директория: {os.getcwd()}")
 logger.info(f"⏱ Длительность записи аудио: {RECORD_DURATION_SECONDS} сек.")
 
+# Шина событий модуля создается один раз (eventfd и пул обработчиков) и переиспользуется
+EVENT_BUS = EventBus()
+
+# Временные WAV лучше держать в tmpfs: запись вопроса не доходит до SD-карты
+_AUDIO_TMP_DIR = '/dev/shm' if os.path.isdir('/dev/shm') else None
+
+def _new_wav_path():
+    """Создать пустой временный WAV файл и вернуть его путь"""
+    with tempfile.NamedTemporaryFile(suffix=".wav", delete=False, dir=_AUDIO_TMP_DIR) as tmp:
+        return tmp.name
+
+# Один поток для записи WAV на диск: запись идет параллельно с переходом GUI после вопроса
+_io_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='wav-io')
+
+def _write_wav(wav_path, channels, sampwidth, sample_rate, samples):
+    """Сохранить сэмплы в WAV файл (выполняется в _io_pool)"""
+    with open(wav_path, "wb") as f:
+        with wave.open(f, "wb") as wf:
+            wf.setnchannels(channels)
+            wf.setsampwidth(sampwidth)
+            wf.setframerate(sample_rate)
+            # Буфер передается как есть, без промежуточной копии в bytes
+            wf.writeframes(memoryview(samples).cast('B'))
+        # Размер - позиция в уже открытом файле, без отдельного stat после записи
+        size = f.tell()
+    logger.info("💾 WAV файл сохранён: %s (%d байт)", wav_path, size)
+
+# Привязка потоков к ядрам (только Linux), включается переменной PLAYBACK_PIN_CPUS=1:
+# GUI остается на ядре 0, фоновые сетевые задачи - на ядре 1
+_PIN_CPUS = os.environ.get('PLAYBACK_PIN_CPUS') == '1' and hasattr(os, 'sched_setaffinity')
+
+def _pin_to_cpu(cpu):
+    """Привязать текущий поток к ядру cpu, если привязка включена и ядро доступно"""
+    if not _PIN_CPUS:
+        return
+    try:
+        if cpu in os.sched_getaffinity(0):
+            os.sched_setaffinity(0, {cpu})
+    except OSError as e:
+        logger.debug("Не удалось привязать поток к ядру %d: %s", cpu, e)
+
+# Фоновые задачи сценария (загрузка ответа и т.п.), чтобы они шли параллельно с GUI
+_task_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix='playback-task',
+                                initializer=_pin_to_cpu, initargs=(1,))
+
+class _MultipartFile:
+    """
+    Тело multipart/form-data, которое читается по частям прямо с диска.
+    Длина известна заранее, поэтому requests отправляет его потоком с Content-Length,
+    не собирая весь запрос в памяти. tell/seek позволяют urllib3 перемотать тело
+    при повторе запроса
+    """
+    
+    def __init__(self, fields, file_field, filename, path, content_type):
+        boundary = uuid.uuid4().hex
+        head = b''.join(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode()
+            for name, value in fields.items()
+        )
+        head += (
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{file_field}"; filename="{filename}"\r\n'
+            f'Content-Type: {content_type}\r\n\r\n'
+        ).encode()
+        tail = f'\r\n--{boundary}--\r\n'.encode()
+        
+        self.content_type = f'multipart/form-data; boundary={boundary}'
+        self._file = open(path, 'rb')
+        self._head = head
+        self._tail = tail
+        self._file_end = len(head) + os.fstat(self._file.fileno()).st_size
+        self._pos = 0
+        self.len = self._file_end + len(tail)
+    
+    def __len__(self):
+        return self.len
+    
+    def __iter__(self):
+        while chunk := self.read(64 * 1024):
+            yield chunk
+    
+    def read(self, size=-1):
+        end = self.len if size < 0 else min(self.len, self._pos + size)
+        out = bytearray()
+        while self._pos < end:
+            head_len = len(self._head)
+            if self._pos < head_len:
+                chunk = self._head[self._pos:end]
+            elif self._pos < self._file_end:
+                self._file.seek(self._pos - head_len)
+                chunk = self._file.read(min(end, self._file_end) - self._pos)
+                if not chunk:
+                    break  # Файл укоротили после открытия
+            else:
+                chunk = self._tail[self._pos - self._file_end:end - self._file_end]
+            out += chunk
+            self._pos += len(chunk)
+        return bytes(out)
+    
+    def tell(self):
+        return self._pos
+    
+    def seek(self, offset, whence=io.SEEK_SET):
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._pos, io.SEEK_END: self.len}[whence]
+        self._pos = max(0, base + offset)
+        return self._pos
+    
+    def close(self):
+        self._file.close()
+
+# Ответы прокси/балансировщика, при которых вопрос до сервера не дошел - только их
+# безопасно повторять для POST; таймауты и обрывы не повторяем, чтобы не задвоить вопрос
+_POST_RETRY_STATUSES = frozenset({502, 503, 504})
+_POST_RETRIES = 2
+_POST_BACKOFF = 0.3
+
+def _post_question(session, api_url, audio_file, form_fields):
+    """Отправить записанный вопрос на сервер (выполняется в _task_pool)"""
+    body = _MultipartFile(form_fields, 'audio', 'audio.wav', audio_file, 'audio/wav')
+    try:
+        for attempt in range(_POST_RETRIES + 1):
+            body.seek(0)
+            response = session.post(api_url, data=body, headers={'Content-Type': body.content_type},
+                                    timeout=(5, 30))
+            if response.status_code not in _POST_RETRY_STATUSES or attempt == _POST_RETRIES:
+                return response
+            logger.warning("⚠️ Сервер ответил %d, повторяю отправку (%d/%d)",
+                           response.status_code, attempt + 1, _POST_RETRIES)
+            response.close()
+            time.sleep(_POST_BACKOFF * 2 ** attempt)
+    finally:
+        body.close()
+
+def _stat_or_none(path):
+    """os.stat файла или None, если его нет: существование и размер за один системный вызов"""
+    try:
+        return os.stat(path)
+    except FileNotFoundError:
+        return None
+
+# Шаблоны имен видео героя: основное имя первым, затем альтернативные варианты.
+# key - имя героя с "_" вместо пробелов
+_VIDEO_NAME_FMTS = ("{hero}_{i}.mp4", "{i}.mp4", "question_{i}.mp4", "{key}_{i}.mp4")
+
 class VideoManager:
     """Менеджер для работы с видеофайлами"""
     
+    # Имена файлов в папках героев: герой -> множество имен (одно чтение папки на сессию)
+    _hero_files = {}
+    
     @staticmethod
-    def get_video_path(hero_name, record_id):
-        """Получить путь к локальному видеофайлу"""
-        # Формируем имя файла по шаблону: hero_name_record_id.mp4
-        video_filename = f"{hero_name}_{record_id}.mp4"
-        video_path = os.path.join(HERO_VIDEOS_DIR, hero_name, video_filename)
-        
-        logger.debug(f"Ищу видео: {video_path}")
-        
-        if os.path.exists(video_path):
-            file_size = os.path.getsize(video_path)
-            logger.info(f"✅ Видео найдено: {video_path} ({file_size} байт)")
-            return video_path
-        else:
-            # Пробуем альтернативные варианты именования
-            alternative_paths = [
-                os.path.join(HERO_VIDEOS_DIR, hero_name, f"{record_id}.mp4"),
-                os.path.join(HERO_VIDEOS_DIR, hero_name, f"question_{record_id}.mp4"),
-                os.path.join(HERO_VIDEOS_DIR, hero_name, f"{hero_name}_{record_id}.mp4".replace(" ", "_")),
-            ]
-            
-            for alt_path in alternative_paths:
-                if os.path.exists(alt_path):
-                    file_size = os.path.getsize(alt_path)
-                    logger.info(f"✅ Видео найдено (альтернативный путь): {alt_path} ({file_size} байт)")
-                    return alt_path
-            
-            logger.error(f"❌ Видео не найдено: {video_path}")
-            logger.error("Доступные видео в директории:")
-            hero_dir = os.path.join(HERO_VIDEOS_DIR, hero_name)
-            if os.path.exists(hero_dir):
-                for file in os.listdir(hero_dir):
-                    if file.endswith('.mp4'):
-                        logger.error(f"  - {file}")
-            
+    def index_hero_videos(hero_name):
+        """Множество имен файлов в папке героя (None, если папки нет); читается один раз"""
+        files = VideoManager._hero_files.get(hero_name)
+        if files is None:
+            try:
+                with os.scandir(os.path.join(HERO_VIDEOS_DIR, hero_name)) as it:
+                    files = {e.name for e in it if e.is_file()}
+            except FileNotFoundError:
+                return None
+            except OSError as e:
+                # Нет прав, путь - файл и т.п.: для отчета это та же "папка недоступна"
+                logger.warning("⚠️ Папка героя %s недоступна: %s", hero_name, e)
+                return None
+            VideoManager._hero_files[hero_name] = files
+        return files
+    
+    @staticmethod
+    def get_video_path(hero_name, record_id, files_set=None, hero_key=None):
+        """
+        Получить путь к локальному видеофайлу.
+        files_set - уже прочитанные имена файлов папки героя: проверка без обращений к диску;
+        hero_key - имя героя с "_" вместо пробелов, если уже посчитано вызывающим
+        """
+        if hero_key is None:
+            hero_key = hero_name.replace(" ", "_")
+        hero_dir = os.path.join(HERO_VIDEOS_DIR, hero_name)
+        
+        # Основное имя по шаблону hero_name_record_id.mp4, затем альтернативные варианты
+        names = [fmt.format(hero=hero_name, key=hero_key, i=record_id) for fmt in _VIDEO_NAME_FMTS]
+        video_path = os.path.join(hero_dir, names[0])
+        
+        logger.debug("Ищу видео: %s", video_path)
+        
+        if files_set is not None:
+            for name in names:
+                if name in files_set:
+                    return os.path.join(hero_dir, name)
             return None
+        
+        for n, name in enumerate(names):
+            path = os.path.join(hero_dir, name)
+            st = _stat_or_none(path)
+            if st is not None:
+                if n == 0:
+                    logger.info("✅ Видео найдено: %s (%d байт)", path, st.st_size)
+                else:
+                    logger.info("✅ Видео найдено (альтернативный путь): %s (%d байт)", path, st.st_size)
+                return path
+        
+        logger.error("❌ Видео не найдено: %s", video_path)
+        logger.error("Доступные видео в директории:")
+        if os.path.exists(hero_dir):
+            for file in os.listdir(hero_dir):
+                if file.endswith('.mp4'):
+                    logger.error("  - %s", file)
+        
+        return None
+    
+    @staticmethod
+    def find_video(hero_name, record_id):
+        """Найти видео ответа: сначала по индексу папки героя, при промахе - на диске"""
+        hero_files = VideoManager.index_hero_videos(hero_name)
+        return (
+            hero_files is not None
+            and VideoManager.get_video_path(hero_name, record_id, hero_files)
+        ) or VideoManager.get_video_path(hero_name, record_id)
+    
+    @staticmethod
+    def check_prerecorded_videos_for_hero(hero):
+        """Проверить видео одного героя; вернуть описание пропуска или None"""
+        hero_dir = os.path.join(HERO_VIDEOS_DIR, hero)
+        
+        # Одно чтение папки героя вместо нескольких stat на каждое видео;
+        # результат остается в индексе и используется во время сессии
+        files = VideoManager.index_hero_videos(hero)
+        if files is None:
+            logger.warning("⚠️ Директория для героя %s не найдена: %s", hero, hero_dir)
+            return hero
+        
+        # Ожидаем 6 видео на героя (номера 1-6)
+        expected_count = 6
+        expected = {f"{hero}_{i}.mp4": i for i in range(1, expected_count + 1)}
+        actual_count = expected_count
+        
+        # Обычно все видео названы по основному шаблону - хватает разности множеств,
+        # альтернативные имена проверяем только для недостающих
+        missing_names = expected.keys() - files
+        if missing_names:
+            hero_key = hero.replace(" ", "_")
+            for i in sorted(expected[name] for name in missing_names):
+                if not VideoManager.get_video_path(hero, i, files, hero_key):
+                    actual_count -= 1
+                    logger.warning("⚠️ Не найдено видео для %s, вопрос %d", hero, i)
+        
+        logger.info("✅ Герой %s: найдено %d/%d видео", hero, actual_count, expected_count)
+        
+        if actual_count < expected_count:
+            return f"{hero} ({actual_count}/{expected_count})"
+        return None
     
     @staticmethod
     def check_prerecorded_videos(heroes):
         """Проверить наличие предзаписанных видео для героев"""
         logger.info("🔍 Проверяю наличие предзаписанных видео...")
         
-        missing_videos = []
+        if not heroes:
+            logger.info("🎉 Все видео найдены!")
+            return True
         
-        for hero in heroes[::-1]:
-            hero_dir = os.path.join(HERO_VIDEOS_DIR, hero)
-            
-            if not os.path.exists(hero_dir):
-                logger.warning(f"⚠️ Директория для героя {hero} не найдена: {hero_dir}")
-                missing_videos.append(hero)
-                continue
-            
-            # Ожидаем 6 видео на героя (номера 1-6)
-            expected_count = 6
-            actual_count = 0
-            
-            for i in range(1, expected_count + 1):
-                video_path = VideoManager.get_video_path(hero, i)
-                if video_path:
-                    actual_count += 1
-                else:
-                    logger.warning(f"⚠️ Не найдено видео для {hero}, вопрос {i}")
-            
-            if actual_count < expected_count:
-                missing_videos.append(f"{hero} ({actual_count}/{expected_count})")
-            
-            logger.info(f"✅ Герой {hero}: найдено {actual_count}/{expected_count} видео")
+        # Папки героев независимы - сканируем их параллельно,
+        # общее время определяется самым медленным героем
+        with ThreadPoolExecutor(max_workers=min(8, len(heroes))) as executor:
+            results = list(executor.map(VideoManager.check_prerecorded_videos_for_hero, heroes[::-1]))
         
+        missing_videos = [r for r in results if r is not None]
         if missing_videos:
-            logger.warning(f"⚠️ Пропущенные видео: {missing_videos}")
+            logger.warning("⚠️ Пропущенные видео: %s", missing_videos)
         else:
             logger.info("🎉 Все видео найдены!")
         
@@ -145,25 +360,41 @@ class VideoManager:
 class SimpleAudioRecorder:
     """Класс для реальной записи аудио с микрофона"""
 
-    def __init__(self, gui_callback=None):
+    # Найденные частота и устройство общие для всех записей - повторно не перебираем
+    _cached_rate = None
+    _cached_device_index = None
+
+    def __init__(self, gui_callback=None, chunk=1024):
         self.sample_rate = 16000  # Начальное значение
         self.channels = 1
         self.format = pyaudio.paInt16
-        self.chunk = 1024
+        self.chunk = chunk
         self.gui_callback = gui_callback
         self.stop_recording = False
         self.audio = None
         self.stream = None
+        # Буфер текущей записи, его заполняет callback потока
+        self._buf = None
+        self._written = 0
+        # Буфер выделяется один раз и переиспользуется всеми записями сессии
+        self._rec_buf = None
+        # Фоновая запись последнего WAV на диск
+        self._wav_future = None
 
     def find_supported_sample_rate(self, audio):
         """Найти поддерживаемую частоту дискретизации"""
+        if SimpleAudioRecorder._cached_rate is not None:
+            return SimpleAudioRecorder._cached_rate
+        
         try:
             device_info = audio.get_default_input_device_info()
             logger.info(f"📊 Устройство записи: {device_info.get('name')}")
             logger.info(f"📊 Частота по умолчанию: {device_info.get('defaultSampleRate')}")
             
-            # Пробуем разные частоты дискретизации
-            sample_rates = [16000, 44100, 48000, 22050, 8000, 96000, 11025]
+            # Пробуем разные частоты дискретизации. Для голоса достаточно 16 кГц,
+            # поэтому сначала идут ближайшие к ней сверху (меньше данных в записи и загрузке),
+            # а частоты ниже 16 кГц - только в крайнем случае
+            sample_rates = [16000, 22050, 32000, 44100, 48000, 96000, 11025, 8000]
             
             for rate in sample_rates:
                 try:
@@ -178,6 +409,8 @@ class SimpleAudioRecorder:
                     )
                     test_stream.close()
                     logger.info(f"✅ Частота {rate} Hz поддерживается")
+                    SimpleAudioRecorder._cached_rate = rate
+                    SimpleAudioRecorder._cached_device_index = device_info['index']
                     return rate
                 except Exception as e:
                     logger.debug(f"⚠️ Частота {rate} Hz не поддерживается: {str(e)[:50]}")
@@ -191,91 +424,87 @@ class SimpleAudioRecorder:
             logger.error(f"❌ Ошибка при поиске частоты дискретизации: {e}")
             return 44100  # Возвращаем безопасное значение
 
-    def record_audio(self, duration=RECORD_DURATION_SECONDS):
-        """Записать аудио с микрофона и вернуть путь к WAV файлу"""
-        self.audio = pyaudio.PyAudio()
-        self.stream = None
-        frames = []
-
+    def record_audio(self, duration=RECORD_DURATION_SECONDS, wav_path=None):
+        """
+        Записать аудио с микрофона и вернуть путь к WAV файлу.
+        wav_path - переиспользуемый файл сессии; без него создается новый временный файл
+        """
         try:
-            logger.info(f"🎤 Начинаю ЗАПИСЬ с микрофона ({duration} сек)...")
-            
-            # Находим поддерживаемую частоту дискретизации
-            self.sample_rate = self.find_supported_sample_rate(self.audio)
-            logger.info(f"📊 Использую частоту дискретизации: {self.sample_rate} Hz")
-            
-            device_info = self.audio.get_default_input_device_info()
-            
-            # Открываем поток с найденной частотой
-            self.stream = self.audio.open(
-                format=self.format,
-                channels=self.channels,
-                rate=self.sample_rate,
-                input=True,
-                frames_per_buffer=self.chunk,
-                input_device_index=device_info['index']
-            )
+            logger.info("🎤 Начинаю ЗАПИСЬ с микрофона (%s сек)...", duration)
             
-            total_chunks = int(self.sample_rate / self.chunk * duration)
+            # Буфер на всю запись выделяется один раз на сессию.
+            # Частота известна только после открытия потока, поэтому он открывается первым
             self.stop_recording = False
-            
-            logger.info(f"📊 Всего чанков для записи: {total_chunks}")
-
-            for i in range(total_chunks):
-                if self.stop_recording:
-                    logger.info("🛑 Запись остановлена досрочно")
-                    break
-                    
-                try:
-                    # Читаем данные из потока
-                    data = self.stream.read(self.chunk, exception_on_overflow=False)
-                    frames.append(data)
-                    
-                    # Обновляем GUI каждую секунду
-                    if self.gui_callback and i % (self.sample_rate // self.chunk) == 0:
-                        elapsed_seconds = i * self.chunk / self.sample_rate
-                        seconds_left = int(duration - elapsed_seconds)
-                        self.gui_callback(seconds_left)
-                        
-                except IOError as e:
-                    logger.warning(f"⚠️ Ошибка чтения аудио-чанка {i}: {e}")
-                    # Добавляем тишину вместо потерянных данных
-                    frames.append(b'\x00' * self.chunk * 2)
+            self._written = 0
+            self._buf = None
+            stream = self.ensure_stream_open()
+            total_frames = int(self.sample_rate * duration) * self.channels
+            
+            # Буфер прошлой записи мог еще не дописаться в WAV - дожидаемся перед перезаписью
+            if self._wav_future is not None:
+                self.wait_saved()
+            if self._rec_buf is None or self._rec_buf.size != total_frames:
+                self._rec_buf = np.empty(total_frames, dtype=np.int16)
+            self._buf = self._rec_buf
+            
+            logger.info("📊 Всего кадров для записи: %d", total_frames)
+            stream.start_stream()
+            
+            # Основной поток только ждет и обновляет GUI ровно раз в секунду по монотонным часам,
+            # независимо от размера чанка. Первый тик - сразу, дальше по целым прошедшим секундам
+            start = time.monotonic()
+            next_tick = start
+            while not self.stop_recording and stream.is_active():
+                now = time.monotonic()
+                if self.gui_callback and now >= next_tick:
+                    self.gui_callback(duration - int(now - start))
+                    next_tick += 1.0
+                time.sleep(0.1)
+            
+            # Поток не закрываем - следующая запись просто запустит его снова
+            if not stream.is_stopped():
+                stream.stop_stream()
+            
+            buf = self._buf
+            if self.stop_recording:
+                logger.info("🛑 Запись остановлена досрочно")
+                buf = buf[:self._written]
+            else:
+                # Недописанный хвост (если поток остановился раньше) - тишина
+                buf[self._written:] = 0
 
-            logger.info(f"✅ Запись завершена, собрано {len(frames)} чанков")
+            logger.info("✅ Запись завершена, собрано %d кадров", self._written)
 
-            # Создаём временный WAV файл
-            with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp:
-                wav_path = tmp.name
+            # Создаём временный WAV файл, если не передан файл сессии
+            if wav_path is None:
+                wav_path = _new_wav_path()
 
-            # Сохраняем аудио в WAV файл
-            with wave.open(wav_path, "wb") as wf:
-                wf.setnchannels(self.channels)
-                wf.setsampwidth(self.audio.get_sample_size(self.format))
-                wf.setframerate(self.sample_rate)
-                wf.writeframes(b"".join(frames))
-
-            file_size = os.path.getsize(wav_path)
-            logger.info(f"💾 WAV файл сохранён: {wav_path} ({file_size} байт)")
-            
-            # Проверяем, не пустой ли файл
-            if file_size < 100:  # Минимальный размер для WAV заголовка
-                logger.warning("⚠️ Создан очень маленький WAV файл. Возможно, запись не удалась.")
+            # Проверяем, не пустая ли запись
+            if buf.size == 0:
+                logger.warning("⚠️ Не записано ни одного кадра. Возможно, запись не удалась.")
                 # Создаем тестовый аудиофайл с тишиной
                 self.create_silent_wav(wav_path, duration)
-                file_size = os.path.getsize(wav_path)
-                logger.info(f"📁 Создан тестовый WAV файл: {wav_path} ({file_size} байт)")
+                self._wav_future = None
+                return wav_path
 
+            # Сохраняем аудио в WAV файл в фоне без копии буфера:
+            # следующая запись дождется окончания сохранения, прежде чем писать в него
+            self._wav_future = _io_pool.submit(
+                _write_wav, wav_path, self.channels,
+                self.audio.get_sample_size(self.format), self.sample_rate, buf
+            )
             return wav_path
 
-        except Exception as e:
-            logger.error(f"❌ Критическая ошибка записи аудио: {e}")
-            logger.error(traceback.format_exc())
+        except Exception:
+            logger.exception("❌ Критическая ошибка записи аудио")
+            
+            # Поток в неизвестном состоянии - закрываем, следующая запись откроет новый
+            self.cleanup()
             
             # Пробуем создать пустой аудиофайл для продолжения работы
             try:
-                with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp:
-                    wav_path = tmp.name
+                if wav_path is None:
+                    wav_path = _new_wav_path()
                 
                 self.create_silent_wav(wav_path, duration)
                 logger.warning(f"⚠️ Создан тестовый WAV файл после ошибки: {wav_path}")
@@ -284,28 +513,87 @@ class SimpleAudioRecorder:
                 logger.error(f"❌ Не удалось создать тестовый файл: {inner_e}")
                 return None
 
-        finally:
-            self.cleanup()
+    def wait_saved(self, timeout=5):
+        """Дождаться фоновой записи последнего WAV; False - если она не удалась"""
+        future, self._wav_future = self._wav_future, None
+        if future is None:
+            return True
+        try:
+            future.result(timeout=timeout)
+            return True
+        except Exception as e:
+            logger.error(f"❌ Ошибка сохранения WAV файла: {e}")
+            return False
+
+    def ensure_stream_open(self):
+        """Открыть поток записи один раз на всю сессию (в остановленном состоянии)"""
+        if self.stream is not None:
+            return self.stream
+        
+        # PyAudio живет между записями, его инициализация заметно дороже открытия потока
+        if self.audio is None:
+            self.audio = pyaudio.PyAudio()
+        
+        # Находим поддерживаемую частоту дискретизации
+        self.sample_rate = self.find_supported_sample_rate(self.audio)
+        logger.info(f"📊 Использую частоту дискретизации: {self.sample_rate} Hz")
+        
+        device_index = SimpleAudioRecorder._cached_device_index
+        if device_index is None:
+            device_index = self.audio.get_default_input_device_info()['index']
+        
+        # Открываем поток с найденной частотой в режиме callback.
+        # PyAudio сам запрашивает у PortAudio defaultLowInputLatency устройства,
+        # размер блока задается явно (chunk, по умолчанию 1024 - степень двойки)
+        self.stream = self.audio.open(
+            format=self.format,
+            channels=self.channels,
+            rate=self.sample_rate,
+            input=True,
+            frames_per_buffer=self.chunk,
+            input_device_index=device_index,
+            stream_callback=self._on_audio,
+            start=False
+        )
+        logger.info("📊 Поток записи: блок %d кадров, задержка входа %.1f мс",
+                    self.chunk, self.stream.get_input_latency() * 1000)
+        return self.stream
+
+    def _on_audio(self, in_data, frame_count, time_info, status):
+        """Callback PortAudio: копирует чанк в буфер текущей записи из потока аудиодрайвера"""
+        buf = self._buf
+        if buf is None:
+            return (None, pyaudio.paComplete)
+        
+        samples = np.frombuffer(in_data, dtype=np.int16)
+        written = self._written
+        n = min(len(samples), len(buf) - written)
+        buf[written:written + n] = samples[:n]
+        self._written = written + n
+        if self._written >= len(buf) or self.stop_recording:
+            return (None, pyaudio.paComplete)
+        return (None, pyaudio.paContinue)
 
     def create_silent_wav(self, filepath, duration):
         """Создать WAV файл с тишиной (для тестирования)"""
         try:
             sample_rate = self.sample_rate if hasattr(self, 'sample_rate') else 16000
             num_frames = int(sample_rate * duration)
-            silent_data = b'\x00' * num_frames * 2  # 2 байта на сэмпл для paInt16
             
             with wave.open(filepath, "wb") as wf:
                 wf.setnchannels(self.channels)
                 wf.setsampwidth(2)  # 2 байта для paInt16
                 wf.setframerate(sample_rate)
-                wf.writeframes(silent_data)
+                # Тишина - обнуленный int16-буфер того же вида, что и при записи с микрофона
+                silent = np.zeros(num_frames * self.channels, dtype=np.int16)
+                wf.writeframes(memoryview(silent).cast('B'))
                 
             logger.info(f"📁 Создан WAV с тишиной: {filepath}, {duration} сек, {sample_rate} Hz")
         except Exception as e:
             logger.error(f"❌ Ошибка создания тестового WAV: {e}")
 
     def cleanup(self):
-        """Очистка ресурсов"""
+        """Закрыть поток записи (при выходе или после ошибки); PyAudio остается"""
         try:
             if self.stream:
                 self.stream.stop_stream()
@@ -313,6 +601,10 @@ class SimpleAudioRecorder:
                 self.stream = None
         except Exception as e:
             logger.debug(f"⚠️ Ошибка при закрытии потока: {e}")
+
+    def terminate(self):
+        """Освободить все ресурсы, включая PyAudio (при завершении приложения)"""
+        self.cleanup()
         
         try:
             if self.audio:
@@ -322,60 +614,133 @@ class SimpleAudioRecorder:
             logger.debug(f"⚠️ Ошибка при завершении PyAudio: {e}")
 
     def stop(self):
-        """Остановить запись досрочно"""
+        """Остановить запись досрочно; поток остается открытым для следующей записи"""
         self.stop_recording = True
-        self.cleanup()
+        try:
+            if self.stream and not self.stream.is_stopped():
+                self.stream.stop_stream()
+        except Exception as e:
+            logger.debug(f"⚠️ Ошибка при остановке потока: {e}")
     
     def __del__(self):
         """Деструктор для гарантированной очистки"""
-        self.cleanup()
+        self.terminate()
 
 class VideoPlayer:
     """Класс для воспроизведения видео"""
     
+    # Сколько байт начала ролика заранее подкачивать в page cache
+    PRELOAD_BYTES = 8 * 1024 * 1024
+    
+    # Команда плеера (без пути к ролику) ищется в PATH один раз на процесс
+    _player_argv = None
+    
+    @classmethod
+    def player_argv(cls):
+        """Команда запуска mpv с полным путем к бинарнику"""
+        if cls._player_argv is None:
+            player = shutil.which("mpv")
+            if player is None:
+                logger.error("❌ mpv не найден в PATH")
+                player = "mpv"
+            cls._player_argv = [player, "--fs", "--no-input-default-bindings"]
+        return cls._player_argv
+    
+    def __init__(self):
+        self._preloaded_path = None
+        self._preloaded_stat = None
+    
+    def preload(self, video_path):
+        """
+        Заранее подкачать начало ролика в page cache, пока на экране пауза.
+        Чтение идет в фоне средствами ядра, mpv затем открывает файл уже из памяти
+        """
+        video_path = os.fspath(video_path)
+        try:
+            fd = os.open(video_path, os.O_RDONLY)
+        except OSError as e:
+            logger.debug("Не удалось подготовить видео %s: %s", video_path, e)
+            return False
+        try:
+            st = os.fstat(fd)
+            if hasattr(os, 'posix_fadvise'):
+                os.posix_fadvise(fd, 0, min(st.st_size, self.PRELOAD_BYTES), os.POSIX_FADV_WILLNEED)
+        finally:
+            os.close(fd)
+        
+        self._preloaded_path = video_path
+        self._preloaded_stat = st
+        return True
+    
+    @staticmethod
+    def _stop_player(proc, grace=2):
+        """Остановить группу процессов плеера: SIGTERM, через grace секунд - SIGKILL"""
+        try:
+            os.killpg(proc.pid, signal.SIGTERM)
+            try:
+                proc.communicate(timeout=grace)
+                return
+            except subprocess.TimeoutExpired:
+                os.killpg(proc.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        proc.communicate()
+    
     def play_video(self, video_path, blocking=True):
         """Воспроизвести видеофайл"""
+        video_path = os.fspath(video_path)
         try:
-            logger.info(f"🎬 Пытаюсь воспроизвести видео: {video_path}")
+            logger.info("🎬 Пытаюсь воспроизвести видео: %s", video_path)
             
-            # Проверяем существование файла
-            if not os.path.exists(video_path):
-                logger.error(f"❌ Видеофайл не найден: {video_path}")
+            # Проверяем существование файла (для подготовленного ролика stat уже есть)
+            if video_path == self._preloaded_path:
+                st = self._preloaded_stat
+                self._preloaded_path = self._preloaded_stat = None
+            else:
+                st = _stat_or_none(video_path)
+            if st is None:
+                logger.error("❌ Видеофайл не найден: %s", video_path)
                 return False
             
-            file_size = os.path.getsize(video_path)
-            logger.info(f"✅ Видеофайл найден: {video_path} ({file_size} байт)")
+            logger.info("✅ Видеофайл найден: %s (%d байт)", video_path, st.st_size)
             
             # Используем mpv
-            cmd = ["mpv", "--fs", "--no-input-default-bindings", video_path]
-            logger.info(f"🚀 Запускаю команду: {' '.join(cmd)}")
+            cmd = self.player_argv() + [video_path]
+            logger.info("🚀 Запускаю команду: %s", cmd)
             
             if blocking:
-                # Запускаем с таймаутом
+                # Запускаем с таймаутом; stdout mpv не нужен, stderr читаем только для ошибки.
+                # Своя сессия (группа процессов) позволяет остановить плеер целиком через killpg
+                proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                                        close_fds=True, start_new_session=True)
                 try:
-                    result = subprocess.run(cmd, capture_output=True, text=True, timeout=120)
-                    
-                    if result.returncode == 0:
-                        logger.info("✅ Видео воспроизведено успешно")
-                        return True
-                    else:
-                        logger.warning(f"⚠️ mpv завершился с кодом: {result.returncode}")
-                        if result.stderr:
-                            logger.error(f"Ошибка mpv: {result.stderr[:200]}")
-                        return True  # Все равно считаем успехом
-                        
+                    _, err = proc.communicate(timeout=120)
                 except subprocess.TimeoutExpired:
+                    self._stop_player(proc)
                     logger.warning("⚠️ Таймаут воспроизведения (120 секунд)")
                     return True
+                except BaseException:
+                    # Ctrl+C до плеера в отдельной сессии не доходит - останавливаем его сами
+                    self._stop_player(proc)
+                    raise
+                
+                if proc.returncode == 0:
+                    logger.info("✅ Видео воспроизведено успешно")
+                    return True
+                else:
+                    logger.warning("⚠️ mpv завершился с кодом: %s", proc.returncode)
+                    if err:
+                        logger.error("Ошибка mpv: %s", err[:200].decode('utf-8', 'replace'))
+                    return True  # Все равно считаем успехом
             else:
-                # Неблокирующий запуск
-                subprocess.Popen(cmd)
+                # Неблокирующий запуск; вывод отбрасываем, чтобы mpv не встал на полном пайпе
+                subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                 close_fds=True, start_new_session=True)
                 logger.info("🎬 Видео запущено в фоновом режиме")
                 return True
                 
-        except Exception as e:
-            logger.error(f"❌ Ошибка воспроизведения видео: {e}")
-            logger.error(traceback.format_exc())
+        except Exception:
+            logger.exception("❌ Ошибка воспроизведения видео")
             return False
 
 class MainGUI:
@@ -391,6 +756,13 @@ class MainGUI:
         self.is_recording = False
         self.recording_seconds_left = RECORD_DURATION_SECONDS
         self.fullscreen = True  # Флаг полноэкранного режима
+        self._recording_hero = None  # Герой, показанный на экране записи
+        self._shown_at = time.monotonic()  # Когда был показан текущий экран
+        # Устанавливается, когда mainloop отрисовал первый экран (или GUI не поднялся)
+        self.ready_event = threading.Event()
+        # Последнее значение таймера от рекордера; в Tk его переносит _poll_timer
+        self._last_timer_val = None
+        self._shown_timer_val = None
     
     def initialize(self):
         """Инициализировать GUI"""
@@ -411,11 +783,11 @@ class MainGUI:
                 if not self.fullscreen:
                     self.center_window(self.root)
                 
+                self._build_screens()
                 self._initialized = True
                 logger.info("✅ Tkinter инициализирован")
-        except Exception as e:
-            logger.error(f"❌ Ошибка инициализации Tkinter: {e}")
-            logger.error(traceback.format_exc())
+        except Exception:
+            logger.exception("❌ Ошибка инициализации Tkinter")
     
     def center_window(self, window):
         """Центрировать окно на экране"""
@@ -445,50 +817,178 @@ class MainGUI:
         except Exception as e:
             logger.error(f"❌ Ошибка центрирования окна: {e}")
     
+    def _build_screens(self):
+        """Создать все экраны один раз; дальше они только переключаются и перенастраиваются"""
+        # Экраны лежат в одной ячейке сетки, видимый поднимается через tkraise()
+        self.root.grid_rowconfigure(0, weight=1)
+        self.root.grid_columnconfigure(0, weight=1)
+        
+        # Экран загрузки
+        self._loading_frame = tk.Frame(self.root, bg='#1a1a1a')
+        self._loading_frame.grid(row=0, column=0, sticky='nsew')
+        
+        # Центрируем содержимое
+        center_frame = tk.Frame(self._loading_frame, bg='#1a1a1a')
+        center_frame.pack(expand=True)
+        
+        # Индикатор загрузки
+        tk.Label(
+            center_frame,
+            text="⏳",
+            font=('Arial', 72),
+            bg='#1a1a1a',
+            fg='#ffffff'
+        ).pack(pady=30)
+        
+        # Сообщение
+        self._loading_message = tk.Label(
+            center_frame,
+            font=('Arial', 24),
+            bg='#1a1a1a',
+            fg='#cccccc'
+        )
+        self._loading_message.pack(pady=20)
+        
+        # Экран записи
+        self._recording_frame = tk.Frame(self.root, bg='#1a1a1a')
+        self._recording_frame.grid(row=0, column=0, sticky='nsew')
+        
+        main_frame = tk.Frame(self._recording_frame, bg='#1a1a1a')
+        main_frame.pack(expand=True, fill='both', padx=50, pady=50)
+        
+        # Верхняя панель с информацией
+        top_frame = tk.Frame(main_frame, bg='#1a1a1a')
+        top_frame.pack(fill='x', pady=(0, 50))
+        
+        # Имя героя
+        self._hero_label = tk.Label(
+            top_frame,
+            font=('Arial', 28, 'bold'),
+            bg='#1a1a1a',
+            fg='#ffffff',
+            anchor='w'
+        )
+        self._hero_label.pack(side='left', padx=(0, 50))
+        
+        # Прогресс
+        self.progress_label = tk.Label(
+            top_frame,
+            font=('Arial', 24),
+            bg='#1a1a1a',
+            fg='#cccccc',
+            anchor='e'
+        )
+        self.progress_label.pack(side='right')
+        
+        # Центральная область
+        center_frame = tk.Frame(main_frame, bg='#1a1a1a')
+        center_frame.pack(expand=True)
+        
+        # Главный заголовок
+        tk.Label(
+            center_frame,
+            text="ЗАДАЙТЕ ВОПРОС ГЕРОЮ",
+            font=('Arial', 36, 'bold'),
+            bg='#1a1a1a',
+            fg='#ffffff'
+        ).pack(pady=(0, 40))
+        
+        # Микрофон
+        tk.Label(
+            center_frame,
+            text="🎤",
+            font=('Arial', 120),
+            bg='#1a1a1a',
+            fg='#ffffff'
+        ).pack(pady=30)
+        
+        # Таймер
+        self.timer_label = tk.Label(
+            center_frame,
+            text=str(RECORD_DURATION_SECONDS),
+            font=('Arial', 72, 'bold'),
+            bg='#1a1a1a',
+            fg='#ff4444'
+        )
+        self.timer_label.pack(pady=30)
+        
+        # Время записи
+        tk.Label(
+            center_frame,
+            text=f"Время записи: {RECORD_DURATION_SECONDS} сек.",
+            font=('Arial', 16),
+            bg='#1a1a1a',
+            fg='#888888'
+        ).pack(pady=(0, 10))
+        
+        # Инструкция
+        tk.Label(
+            center_frame,
+            text="ГОТОВЬТЕСЬ К ЗАПИСИ...",
+            font=('Arial', 20),
+            bg='#1a1a1a',
+            fg='#888888'
+        ).pack(pady=20)
+        
+        # Нижняя панель
+        bottom_frame = tk.Frame(main_frame, bg='#1a1a1a')
+        bottom_frame.pack(fill='x', pady=(50, 0))
+        
+        # Статус
+        self.status_label = tk.Label(
+            bottom_frame,
+            font=('Arial', 18),
+            bg='#1a1a1a',
+            fg='#aaaaaa'
+        )
+        self.status_label.pack()
+        
+        # Экран ожидания
+        self._waiting_frame = tk.Frame(self.root, bg='#1a1a1a')
+        self._waiting_frame.grid(row=0, column=0, sticky='nsew')
+        
+        # Анимация загрузки
+        tk.Label(
+            self._waiting_frame,
+            text="⏳",
+            font=('Arial', 72),
+            bg='#1a1a1a',
+            fg='#ffffff'
+        ).pack(pady=50)
+        
+        # Сообщение
+        self._waiting_message = tk.Label(
+            self._waiting_frame,
+            font=('Arial', 24),
+            bg='#1a1a1a',
+            fg='#cccccc'
+        )
+        self._waiting_message.pack(pady=20)
+        
+        # Дополнительная информация (скрывается, если герой не указан)
+        self._waiting_info = tk.Label(
+            self._waiting_frame,
+            font=('Arial', 18),
+            bg='#1a1a1a',
+            fg='#888888'
+        )
+    
     def show_loading_screen(self, message="Загрузка..."):
         """Показать экран загрузки"""
         try:
             if not self._initialized:
                 self.initialize()
             
-            # Очищаем корневое окно
-            for widget in self.root.winfo_children():
-                widget.destroy()
-            
-            # Основной фрейм
-            main_frame = tk.Frame(self.root, bg='#1a1a1a')
-            main_frame.pack(expand=True, fill='both')
-            
-            # Центрируем содержимое
-            center_frame = tk.Frame(main_frame, bg='#1a1a1a')
-            center_frame.pack(expand=True)
-            
-            # Индикатор загрузки
-            loading_label = tk.Label(
-                center_frame,
-                text="⏳",
-                font=('Arial', 72),
-                bg='#1a1a1a',
-                fg='#ffffff'
-            )
-            loading_label.pack(pady=30)
-            
-            # Сообщение
-            message_label = tk.Label(
-                center_frame,
-                text=message,
-                font=('Arial', 24),
-                bg='#1a1a1a',
-                fg='#cccccc'
-            )
-            message_label.pack(pady=20)
+            self._loading_message.config(text=message)
+            self._loading_frame.tkraise()
+            self._shown_at = time.monotonic()
             
             # Обновляем окно
             self.root.update()
-            logger.info(f"🖥 Показан экран загрузки: {message}")
+            logger.info("🖥 Показан экран загрузки: %s", message)
             
         except Exception as e:
-            logger.error(f"❌ Ошибка показа экрана загрузки: {e}")
+            logger.error("❌ Ошибка показа экрана загрузки: %s", e)
     
     def show_recording_screen(self, hero_name, question_num, total_questions):
         """Показать экран записи"""
@@ -496,118 +996,26 @@ class MainGUI:
             if not self._initialized:
                 self.initialize()
             
-            # Очищаем корневое окно
-            for widget in self.root.winfo_children():
-                widget.destroy()
-            
-            # Основной фрейм
-            main_frame = tk.Frame(self.root, bg='#1a1a1a')
-            main_frame.pack(expand=True, fill='both', padx=50, pady=50)
-            
-            # Верхняя панель с информацией
-            top_frame = tk.Frame(main_frame, bg='#1a1a1a')
-            top_frame.pack(fill='x', pady=(0, 50))
-            
-            # Имя героя
-            hero_label = tk.Label(
-                top_frame,
-                text=f"👤 {hero_name}",
-                font=('Arial', 28, 'bold'),
-                bg='#1a1a1a',
-                fg='#ffffff',
-                anchor='w'
-            )
-            hero_label.pack(side='left', padx=(0, 50))
-            
-            # Прогресс
-            progress_label = tk.Label(
-                top_frame,
-                text=f"Вопрос {question_num} из {total_questions}",
-                font=('Arial', 24),
-                bg='#1a1a1a',
-                fg='#cccccc',
-                anchor='e'
-            )
-            progress_label.pack(side='right')
-            
-            # Центральная область
-            center_frame = tk.Frame(main_frame, bg='#1a1a1a')
-            center_frame.pack(expand=True)
-            
-            # Главный заголовок
-            title_label = tk.Label(
-                center_frame,
-                text="ЗАДАЙТЕ ВОПРОС ГЕРОЮ",
-                font=('Arial', 36, 'bold'),
-                bg='#1a1a1a',
-                fg='#ffffff'
-            )
-            title_label.pack(pady=(0, 40))
-            
-            # Микрофон
-            mic_label = tk.Label(
-                center_frame,
-                text="🎤",
-                font=('Arial', 120),
-                bg='#1a1a1a',
-                fg='#ffffff'
-            )
-            mic_label.pack(pady=30)
-            
-            # Таймер
-            self.timer_label = tk.Label(
-                center_frame,
-                text=str(RECORD_DURATION_SECONDS),
-                font=('Arial', 72, 'bold'),
-                bg='#1a1a1a',
-                fg='#ff4444'
-            )
-            self.timer_label.pack(pady=30)
-            
-            # Время записи
-            duration_label = tk.Label(
-                center_frame,
-                text=f"Время записи: {RECORD_DURATION_SECONDS} сек.",
-                font=('Arial', 16),
-                bg='#1a1a1a',
-                fg='#888888'
-            )
-            duration_label.pack(pady=(0, 10))
-            
-            # Инструкция
-            instruction_label = tk.Label(
-                center_frame,
-                text="ГОТОВЬТЕСЬ К ЗАПИСИ...",
-                font=('Arial', 20),
-                bg='#1a1a1a',
-                fg='#888888'
-            )
-            instruction_label.pack(pady=20)
-            
-            # Нижняя панель
-            bottom_frame = tk.Frame(main_frame, bg='#1a1a1a')
-            bottom_frame.pack(fill='x', pady=(50, 0))
-            
-            # Статус
-            self.status_label = tk.Label(
-                bottom_frame,
-                text="⏳ Подготовка к записи...",
-                font=('Arial', 18),
-                bg='#1a1a1a',
-                fg='#aaaaaa'
-            )
-            self.status_label.pack()
+            # Возвращаем виджеты в исходное состояние вместо создания новых;
+            # между вопросами одного героя меняется только номер вопроса
+            if hero_name != self._recording_hero:
+                self._hero_label.config(text=f"👤 {hero_name}")
+                self._recording_hero = hero_name
+            self.progress_label.config(text=f"Вопрос {question_num} из {total_questions}")
+            self.timer_label.config(text=str(RECORD_DURATION_SECONDS), fg='#ff4444')
+            self.status_label.config(text="⏳ Подготовка к записи...", fg='#aaaaaa')
+            self._recording_frame.tkraise()
+            self._shown_at = time.monotonic()
             
             # Обновляем окно
             self.root.update()
             self.is_recording = False
             self.recording_seconds_left = RECORD_DURATION_SECONDS
             
-            logger.info(f"🖥 Показан экран записи для {hero_name}, вопрос {question_num}")
+            logger.info("🖥 Показан экран записи для %s, вопрос %d", hero_name, question_num)
             
-        except Exception as e:
-            logger.error(f"❌ Ошибка показа экрана записи: {e}")
-            logger.error(traceback.format_exc())
+        except Exception:
+            logger.exception("❌ Ошибка показа экрана записи")
     
     def show_waiting_screen(self, hero_name, message="Обработка ответа..."):
         """Показать экран ожидания"""
@@ -615,52 +1023,36 @@ class MainGUI:
             if not self._initialized:
                 self.initialize()
             
-            # Очищаем корневое окно
-            for widget in self.root.winfo_children():
-                widget.destroy()
-            
-            # Основной фрейм
-            main_frame = tk.Frame(self.root, bg='#1a1a1a')
-            main_frame.pack(expand=True, fill='both')
-            
-            # Анимация загрузки
-            loading_label = tk.Label(
-                main_frame,
-                text="⏳",
-                font=('Arial', 72),
-                bg='#1a1a1a',
-                fg='#ffffff'
-            )
-            loading_label.pack(pady=50)
+            self._waiting_message.config(text=message)
             
-            # Сообщение
-            message_label = tk.Label(
-                main_frame,
-                text=message,
-                font=('Arial', 24),
-                bg='#1a1a1a',
-                fg='#cccccc'
-            )
-            message_label.pack(pady=20)
-            
-            # Дополнительная информация
+            # Дополнительная информация; pack/pack_forget только при смене видимости,
+            # чтобы не запускать лишний пересчет геометрии на каждом экране ожидания
+            packed = bool(self._waiting_info.winfo_manager())
             if hero_name:
-                info_label = tk.Label(
-                    main_frame,
-                    text=f"Герой: {hero_name}",
-                    font=('Arial', 18),
-                    bg='#1a1a1a',
-                    fg='#888888'
-                )
-                info_label.pack(pady=10)
+                self._waiting_info.config(text=f"Герой: {hero_name}")
+                if not packed:
+                    self._waiting_info.pack(pady=10)
+            elif packed:
+                self._waiting_info.pack_forget()
+            self._waiting_frame.tkraise()
+            self._shown_at = time.monotonic()
             
             # Обновляем окно
             self.root.update()
             self.is_recording = False
-            logger.info(f"🖥 Показан экран ожидания: {message}")
+            logger.info("🖥 Показан экран ожидания: %s", message)
             
         except Exception as e:
-            logger.error(f"❌ Ошибка показа экрана ожидания: {e}")
+            logger.error("❌ Ошибка показа экрана ожидания: %s", e)
+    
+    def hold(self, seconds):
+        """
+        Дать текущему экрану провисеть не меньше seconds с момента показа.
+        Работа, сделанная после показа экрана, засчитывается в эту паузу
+        """
+        remaining = seconds - (time.monotonic() - self._shown_at)
+        if remaining > 0:
+            time.sleep(remaining)
     
     def toggle_fullscreen(self, event=None):
         """Переключить полноэкранный режим"""
@@ -688,10 +1080,10 @@ class MainGUI:
             self.is_recording = True
             self.recording_seconds_left = RECORD_DURATION_SECONDS
             
-            self.root.update()
+            # Перерисовку выполнит mainloop - метод вызывается из него в конце отсчета
             
         except Exception as e:
-            logger.error(f"❌ Ошибка перехода в режим записи: {e}")
+            logger.error("❌ Ошибка перехода в режим записи: %s", e)
     
     def update_recording_timer(self, seconds_left):
         """Обновить таймер записи"""
@@ -715,11 +1107,18 @@ class MainGUI:
                     if self.status_label:
                         self.status_label.config(text="✅ Запись завершена", fg='#44ff44')
                 
-                # Обновляем интерфейс
-                self.root.update_idletasks()
+                # Перерисовку выполнит mainloop - метод вызывается из него через after()
                     
         except Exception as e:
-            logger.error(f"❌ Ошибка обновления таймера: {e}")
+            logger.error("❌ Ошибка обновления таймера: %s", e)
+    
+    def _poll_timer(self):
+        """Перенести значение таймера из рекордера в GUI (10 раз в секунду)"""
+        value = self._last_timer_val
+        if value is not None and value != self._shown_timer_val:
+            self._shown_timer_val = value
+            self.update_recording_timer(value)
+        self.root.after(100, self._poll_timer)
     
     def close(self):
         """Закрыть все окна"""
@@ -727,11 +1126,13 @@ class MainGUI:
             if self.root:
                 self.root.quit()
                 self.root.destroy()
-        except:
+        except Exception:
+            # Окно уже закрыто или Tk остановлен - закрывать нечего
             pass
     
     def run(self):
         """Запустить главный цикл GUI"""
+        _pin_to_cpu(0)
         try:
             if not self._initialized:
                 self.initialize()
@@ -742,77 +1143,103 @@ class MainGUI:
                 # Показываем начальный экран
                 self.show_loading_screen("Инициализация...")
                 
+                # Сообщаем о готовности, как только mainloop отрисует первый экран
+                self.root.after_idle(self.ready_event.set)
+                
+                # Таймер записи опрашивается из mainloop - поток рекордера Tk не трогает
+                self._poll_timer()
+                
                 # Запускаем главный цикл
                 self.root.mainloop()
                 
-        except Exception as e:
-            logger.error(f"❌ Ошибка GUI цикла: {e}")
-            logger.error(traceback.format_exc())
+        except Exception:
+            logger.exception("❌ Ошибка GUI цикла")
+        finally:
+            # Не держим основной поток, если GUI так и не поднялся
+            self.ready_event.set()
 
-def play_transition_video(gui, video_path, message="Переход..."):
+def play_transition_video(gui, video_path, message="Переход...", video_player=None):
     """Воспроизвести переходное видео с сохранением GUI"""
     try:
-        logger.info(f"🎬 Начинаю переход: {video_path}")
+        logger.info("🎬 Начинаю переход: %s", video_path)
         
         # Показываем экран загрузки
         gui.show_waiting_screen("", message)
-        time.sleep(1)
+        
+        # preload проверяет наличие файла одним open/fstat (play_video возьмет этот stat)
+        # и подкачивает начало ролика, пока висит экран загрузки
+        if video_player is None:
+            video_player = VideoPlayer()
+        found = video_player.preload(video_path)
+        gui.hold(1)
         
         # Воспроизводим видео
-        video_player = VideoPlayer()
-        if os.path.exists(video_path):
+        if found:
             video_player.play_video(video_path)
         else:
-            logger.warning(f"⚠️ Видео перехода не найдено: {video_path}")
+            logger.warning("⚠️ Видео перехода не найдено: %s", video_path)
             time.sleep(3)
         
-        logger.info(f"✅ Переход завершен: {video_path}")
+        logger.info("✅ Переход завершен: %s", video_path)
         
     except Exception as e:
-        logger.error(f"❌ Ошибка воспроизведения переходного видео: {e}")
+        logger.error("❌ Ошибка воспроизведения переходного видео: %s", e)
 
-def record_audio_with_sync(gui, audio_recorder, hero_name, question_num):
-    """Синхронизированная запись аудио с обновлением GUI"""
+def record_audio_with_sync(gui, audio_recorder, hero_name, question_num, wav_path=None):
+    """Синхронизированная запись аудио с обновлением GUI; wav_path - файл для записи"""
     try:
-        logger.info(f"🎤 Запись аудио для {hero_name}, вопрос {question_num}")
+        logger.info("🎤 Запись аудио для %s, вопрос %d", hero_name, question_num)
         
         # Показываем короткий обратный отсчет перед началом записи (3 секунды)
         gui.show_recording_screen(hero_name, question_num, 6)
         
-        # Короткая подготовка (3 секунды)
-        for sec in range(3, 0, -1):
-            if gui.timer_label:
-                gui.timer_label.config(text=str(sec), fg='#ffff44')
-                if sec == 1:
-                    if gui.status_label:
-                        gui.status_label.config(text="🎤 НАЧАЛО ЗАПИСИ ЧЕРЕЗ...", fg='#ffff44')
-            if gui.current_window:
-                gui.current_window.update()
-            time.sleep(1)
-        
-        # Переключаем в режим записи
-        gui.start_recording_mode()
-        
-        # Начинаем запись в отдельном потоке
         audio_file = None
-        recording_complete = threading.Event()
+        countdown_done = threading.Event()
         
         def record_thread():
             nonlocal audio_file
             try:
+                # Аудиопоток открывается во время отсчета, а не после него
+                try:
+                    audio_recorder.ensure_stream_open()
+                except Exception as e:
+                    logger.warning("⚠️ Не удалось заранее открыть аудиопоток: %s", e)
+                countdown_done.wait()
                 # Начинаем запись с callback для обновления GUI
-                audio_file = audio_recorder.record_audio(duration=RECORD_DURATION_SECONDS)
+                audio_file = audio_recorder.record_audio(duration=RECORD_DURATION_SECONDS, wav_path=wav_path)
             except Exception as e:
-                logger.error(f"❌ Ошибка в потоке записи: {e}")
-            finally:
-                recording_complete.set()
+                logger.error("❌ Ошибка в потоке записи: %s", e)
         
-        # Запускаем поток записи
+        # Запускаем поток записи одновременно с отсчетом
         record_thread_obj = threading.Thread(target=record_thread, daemon=True)
         record_thread_obj.start()
         
+        def countdown_tick(sec):
+            """Шаг отсчета в потоке Tk; следующий шаг планируется через after()"""
+            if sec == 0:
+                # Запись и экран записи стартуют в один момент, без перехода через основной поток
+                countdown_done.set()
+                gui.start_recording_mode()
+                return
+            if gui.timer_label:
+                gui.timer_label.config(text=str(sec), fg='#ffff44')
+                if sec == 1 and gui.status_label:
+                    gui.status_label.config(text="🎤 НАЧАЛО ЗАПИСИ ЧЕРЕЗ...", fg='#ffff44')
+            gui.root.after(1000, countdown_tick, sec - 1)
+        
+        # Короткая подготовка (3 секунды)
+        if gui.root:
+            gui.root.after(0, countdown_tick, 3)
+            if not countdown_done.wait(timeout=5):
+                logger.warning("⚠️ Отсчет в GUI не завершился вовремя, начинаю запись")
+        else:
+            time.sleep(3)
+        countdown_done.set()
+        
         # Ждем завершения записи
-        recording_complete.wait(timeout=RECORD_DURATION_SECONDS + 5)
+        record_thread_obj.join(timeout=RECORD_DURATION_SECONDS + 5)
+        if record_thread_obj.is_alive():
+            logger.warning("⚠️ Запись не завершилась вовремя, останавливаю")
         
         # Завершаем
         audio_recorder.stop()
@@ -822,36 +1249,69 @@ def record_audio_with_sync(gui, audio_recorder, hero_name, question_num):
             gui.timer_label.config(text="✓", fg='#44ff44')
         if gui.status_label:
             gui.status_label.config(text="✅ Запись завершена", fg='#44ff44')
-        if gui.current_window:
-            gui.current_window.update()
         
-        time.sleep(1)  # Короткая пауза перед переходом
+        # Короткая пауза перед переходом, чтобы была видна отметка "✓".
+        # Ожидание фоновой записи WAV засчитывается в эту паузу, а не добавляется к ней
+        dwell_until = time.monotonic() + 1
+        
+        if audio_file and not audio_recorder.wait_saved(timeout=5):
+            audio_file = None
+        
+        remaining = dwell_until - time.monotonic()
+        if remaining > 0:
+            time.sleep(remaining)
         
         return audio_file
         
-    except Exception as e:
-        logger.error(f"❌ Ошибка синхронизированной записи: {e}")
-        logger.error(traceback.format_exc())
+    except Exception:
+        logger.exception("❌ Ошибка синхронизированной записи")
         return None
 
+class _SessionTerminated(KeyboardInterrupt):
+    """Сессия остановлена сигналом SIGTERM"""
+
+def _on_sigterm(signum, frame):
+    """booth_main останавливает модуль через terminate() - завершаемся как по Ctrl+C, с очисткой"""
+    raise _SessionTerminated
+
 def main():
     """Главная функция"""
     gui = None
     audio_recorder = None
+    audio_path = None
+    # Код выхода прерванной сессии: booth_main должен увидеть ошибку, а не playback_finished
+    exit_code = 0
+    
+    # Без обработчика SIGTERM процесс умирает сразу, и mpv (он в своей сессии) продолжает играть
+    signal.signal(signal.SIGTERM, _on_sigterm)
+    
+    # Одна сессия на все вопросы: keep-alive соединение с сервером вместо нового на каждый POST
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=16,
+        # urllib3 повторяет только установку соединения - запрос еще не отправлен.
+        # Ошибки чтения не повторяются: POST вопроса мог уже дойти до сервера.
+        # Ответы 502/503/504 повторяет _post_question
+        max_retries=Retry(total=2, connect=2, read=0, other=0, backoff_factor=0.2)
+    )
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
     
     try:
         # Получаем данные из аргументов
-        logger.info(f"📦 Получаю данные из аргументов...")
+        logger.info("📦 Получаю данные из аргументов...")
         
         if len(sys.argv) > 1:
             try:
                 raw_data = sys.argv[1]
-                logger.info(f"Сырые данные: {raw_data[:100]}...")
+                if logger.isEnabledFor(logging.DEBUG):
+                    logger.debug("Сырые данные: %s...", raw_data[:100])
                 
                 data = json.loads(raw_data)
                 logger.info("✅ JSON успешно распарсен")
             except Exception as e:
-                logger.error(f"❌ Ошибка парсинга JSON: {e}")
+                logger.error("❌ Ошибка парсинга JSON: %s", e)
                 data = {'hero_names': ['Test_Hero'], 'subcategory_id': 13}
         else:
             logger.warning("⚠️ Данные не предоставлены в аргументах")
@@ -860,8 +1320,8 @@ def main():
         heroes = data.get('hero_names', [])
         subcategory_id = data.get('subcategory_id', 13)
         
-        logger.info(f"🎭 Герои для обработки: {heroes}")
-        logger.info(f"🔢 ID подкатегории: {subcategory_id}")
+        logger.info("🎭 Герои для обработки: %s", heroes)
+        logger.info("🔢 ID подкатегории: %s", subcategory_id)
         
         # Проверяем наличие видео
         all_videos_available = VideoManager.check_prerecorded_videos(heroes)
@@ -876,8 +1336,8 @@ def main():
         # Создаем аудиорекордер с callback для обновления GUI
         def update_timer_callback(seconds_left):
             """Callback для обновления таймера из аудиорекордера"""
-            if gui.root:
-                gui.root.after(0, gui.update_recording_timer, seconds_left)
+            # Только сохраняем значение, в GUI его перенесет MainGUI._poll_timer
+            gui._last_timer_val = seconds_left
         
         audio_recorder = SimpleAudioRecorder(gui_callback=update_timer_callback)
         video_player = VideoPlayer()
@@ -887,152 +1347,186 @@ def main():
         gui_thread = threading.Thread(target=gui.run, daemon=True)
         gui_thread.start()
         
-        # Даем время на инициализацию GUI
-        logger.info("⏳ Ожидаю инициализацию GUI (3 секунды)...")
-        time.sleep(3)
+        # Ждем, пока GUI отрисует первый экран, а не фиксированное время
+        logger.info("⏳ Ожидаю инициализацию GUI...")
+        if not gui.ready_event.wait(timeout=10):
+            logger.warning("⚠️ GUI не успел инициализироваться за 10 секунд, продолжаю")
+        
+        # Поиск частоты и открытие потока записи идут в фоне, пока играет приветствие,
+        # а не перед первым вопросом
+        stream_ready = _task_pool.submit(audio_recorder.ensure_stream_open)
         
         # 1. Приветственное видео
         logger.info("🎬 ШАГ 1: ПРИВЕТСТВЕННОЕ ВИДЕО")
-        play_transition_video(gui, "media/greet_video.mp4", "Начало сессии...")
+        play_transition_video(gui, GREETING_VIDEO, "Начало сессии...", video_player)
+        
+        try:
+            stream_ready.result()
+        except Exception as e:
+            # Первая запись попробует открыть поток еще раз
+            logger.warning("⚠️ Не удалось заранее открыть поток записи: %s", e)
+        
+        # Один временный файл на все вопросы: каждая запись перезаписывает его,
+        # вместо создания и удаления файла на каждый вопрос
+        audio_path = _new_wav_path()
+        
+        # URL вопросов одинаков для всей сессии
+        api_url = f"{BASE_URL}/api/sub/{subcategory_id}/ask/"
+        logger.info("🌐 URL сервера: %s", api_url)
         
         # 2. Сессии героев
         logger.info("🎬 ШАГ 2: СЕССИИ ГЕРОЕВ")
         for hero_idx, hero in enumerate(heroes, 1):
-            logger.info(f"\n🎭 [{hero_idx}/{len(heroes)}] НАЧИНАЮ СЕССИЮ ДЛЯ: {hero}")
+            logger.info("\n🎭 [%d/%d] НАЧИНАЮ СЕССИЮ ДЛЯ: %s", hero_idx, len(heroes), hero)
+            
+            # Поля формы не меняются между вопросами одного героя
+            form_fields = {'hero_name': hero, 'language': 'ru'}
             
             # Показываем экран загрузки для героя
             gui.show_loading_screen(f"Подготовка к сессии с {hero}...")
-            time.sleep(2)
+            gui.hold(2)
             
             for question_num in range(1, 7):  # 6 вопросов
-                logger.info(f"❓ ВОПРОС {question_num}/6 ДЛЯ {hero}")
+                logger.info("❓ ВОПРОС %d/6 ДЛЯ %s", question_num, hero)
                 
                 # Синхронизированная запись аудио
-                audio_file = record_audio_with_sync(gui, audio_recorder, hero, question_num)
+                audio_file = record_audio_with_sync(gui, audio_recorder, hero, question_num, audio_path)
                 
                 if not audio_file:
                     logger.error("❌ Не удалось записать аудио")
                     gui.show_waiting_screen(hero, "Ошибка записи аудио")
-                    time.sleep(3)
+                    gui.hold(3)
                     continue
                 
+                # Отправляем на сервер: загрузка стартует сразу и идет параллельно с показом экрана ожидания
+                logger.info("📤 Отправляю аудио на сервер...")
+                upload = _task_pool.submit(_post_question, session, api_url, audio_file, form_fields)
+                
                 # Показываем экран ожидания
                 gui.show_waiting_screen(hero, "Отправка вопроса на сервер...")
                 
-                # Отправляем на сервер
-                logger.info(f"📤 Отправляю аудио на сервер...")
                 try:
-                    api_url = f"{BASE_URL}/api/sub/{subcategory_id}/ask/"
-                    logger.info(f"🌐 URL сервера: {api_url}")
+                    response = upload.result()
+                    logger.info("📥 Ответ сервера: статус %d", response.status_code)
                     
-                    with open(audio_file, 'rb') as f:
-                        files = {'audio': (f'audio.wav', f, 'audio/wav')}
-                        data = {'hero_name': hero, 'language': 'ru'}
+                    if response.status_code == 200:
+                        # json.loads принимает bytes напрямую - без подбора кодировки и промежуточного str
+                        result = json.loads(response.content).get("fastapi_data", {})
+                        logger.info("✅ Сервер успешно принял аудио: %s", result)
                         
-                        response = requests.post(api_url, files=files, data=data, timeout=30)
-                        logger.info(f"📥 Ответ сервера: статус {response.status_code}")
+                        # Получаем record_id и hero_name из ответа
+                        record_id = result.get('record_id')
+                        server_hero_name = result.get('hero_name')
                         
-                        if response.status_code == 200:
-                            result = response.json().get("fastapi_data", {})
-                            logger.info(f"✅ Сервер успешно принял аудио: {result}")
+                        if record_id and server_hero_name:
+                            logger.info("📊 Получены данные: hero=%s, record_id=%s", server_hero_name, record_id)
                             
-                            # Получаем record_id и hero_name из ответа
-                            record_id = result.get('record_id')
-                            server_hero_name = result.get('hero_name')
+                            # Поиск видео идет в фоне, пока перерисовывается экран ожидания
+                            lookup = _task_pool.submit(VideoManager.find_video, server_hero_name, record_id)
+                            gui.show_waiting_screen(server_hero_name, "Подготовка ответа героя...")
+                            local_video_path = lookup.result(timeout=5)
                             
-                            if record_id and server_hero_name:
-                                logger.info(f"📊 Получены данные: hero={server_hero_name}, record_id={record_id}")
+                            if local_video_path:
+                                # Начало ролика читается с диска, пока висит экран ожидания
+                                video_player.preload(local_video_path)
+                                
+                                # Остаток паузы перед воспроизведением
+                                gui.hold(2)
                                 
-                                # Ищем локальное видео
-                                local_video_path = VideoManager.get_video_path(server_hero_name, record_id)
+                                # Воспроизводим видео
+                                logger.info("🎬 Воспроизвожу видео: %s", local_video_path)
+                                video_player.play_video(local_video_path)
                                 
-                                if local_video_path:
-                                    # Показываем экран ожидания перед воспроизведением
-                                    gui.show_waiting_screen(server_hero_name, "Подготовка ответа героя...")
-                                    time.sleep(2)
-                                    
-                                    # Воспроизводим видео
-                                    logger.info(f"🎬 Воспроизвожу видео: {local_video_path}")
-                                    video_player.play_video(local_video_path)
-                                    
-                                    # Показываем экран ожидания после видео
-                                    gui.show_waiting_screen(server_hero_name, "Подготовка к следующему вопросу...")
-                                    time.sleep(2)
-                                else:
-                                    logger.error("❌ Не удалось найти видео для воспроизведения")
-                                    gui.show_waiting_screen(server_hero_name, "Ошибка: видео не найдено")
-                                    time.sleep(3)
+                                # Показываем экран ожидания после видео
+                                gui.show_waiting_screen(server_hero_name, "Подготовка к следующему вопросу...")
+                                gui.hold(2)
                             else:
-                                logger.error("❌ В ответе сервера отсутствуют record_id или hero_name")
-                                gui.show_waiting_screen(hero, "Ошибка: неверный ответ сервера")
-                                time.sleep(3)
+                                logger.error("❌ Не удалось найти видео для воспроизведения")
+                                gui.show_waiting_screen(server_hero_name, "Ошибка: видео не найдено")
+                                gui.hold(3)
                         else:
-                            logger.error(f"❌ Ошибка сервера: {response.status_code}")
-                            if response.text:
-                                logger.error(f"Тело ответа: {response.text[:200]}")
-                            gui.show_waiting_screen(hero, "Ошибка сервера")
-                            time.sleep(3)
+                            logger.error("❌ В ответе сервера отсутствуют record_id или hero_name")
+                            gui.show_waiting_screen(hero, "Ошибка: неверный ответ сервера")
+                            gui.hold(3)
+                    else:
+                        logger.error("❌ Ошибка сервера: %d", response.status_code)
+                        if response.text:
+                            logger.error("Тело ответа: %s", response.text[:200])
+                        # Повторы уже сделал _post_question - сразу переходим к следующему вопросу
+                        gui.show_waiting_screen(hero, "Ошибка сервера")
                             
                 except requests.exceptions.RequestException as e:
-                    logger.error(f"❌ Ошибка сети: {e}")
+                    logger.error("❌ Ошибка сети: %s", e)
                     gui.show_waiting_screen(hero, "Ошибка сети")
-                    time.sleep(3)
-                except Exception as e:
-                    logger.error(f"❌ Неожиданная ошибка: {e}")
-                    logger.error(traceback.format_exc())
+                    gui.hold(3)
+                except Exception:
+                    logger.exception("❌ Неожиданная ошибка")
                     gui.show_waiting_screen(hero, "Ошибка обработки")
-                    time.sleep(3)
-                finally:
-                    # Удаляем аудиофайл
-                    try:
-                        if audio_file and os.path.exists(audio_file):
-                            os.unlink(audio_file)
-                    except:
-                        pass
+                    gui.hold(3)
             
-            logger.info(f"✅ [{hero_idx}/{len(heroes)}] СЕССИЯ ЗАВЕРШЕНА: {hero}")
+            logger.info("✅ [%d/%d] СЕССИЯ ЗАВЕРШЕНА: %s", hero_idx, len(heroes), hero)
             
             # Переход между героями (если не последний)
             if hero_idx < len(heroes):
                 gui.show_loading_screen(f"Переход к следующему герою...")
-                time.sleep(2)
+                gui.hold(2)
         
         # 3. Завершающее видео
         logger.info("\n🎬 ШАГ 3: ЗАВЕРШАЮЩЕЕ ВИДЕО")
-        play_transition_video(gui, "media/end_video.mp4", "Завершение сессии...")
+        play_transition_video(gui, ENDING_VIDEO, "Завершение сессии...", video_player)
         
         # Финальный экран
         gui.show_loading_screen("🎉 Сессия завершена!")
-        time.sleep(3)
         
         logger.info("\n✅ ВОСПРОИЗВЕДЕНИЕ УСПЕШНО ЗАВЕРШЕНО")
         
-        # Публикуем событие завершения
+        # Публикуем событие завершения сразу, не дожидаясь паузы финального экрана:
+        # publish только ставит событие в очередь шины и не блокирует
         try:
             logger.info("📤 Публикую событие playback_finished...")
-            event_bus = EventBus()
-            event_bus.publish("playback_finished", {
+            EVENT_BUS.publish("playback_finished", {
                 "heroes": heroes,
                 "timestamp": time.time(),
                 "message": "Воспроизведение завершено успешно"
             })
         except Exception as e:
-            logger.error(f"❌ Ошибка отправки события: {e}")
+            logger.error("❌ Ошибка отправки события: %s", e)
+        
+        gui.hold(3)
             
+    except _SessionTerminated:
+        logger.info("\n🛑 СЕССИЯ ОСТАНОВЛЕНА (SIGTERM)")
+        exit_code = 128 + signal.SIGTERM
     except KeyboardInterrupt:
         logger.info("\n🛑 ПРЕРВАНО ПОЛЬЗОВАТЕЛЕМ")
-    except Exception as e:
-        logger.error(f"\n❌ КРИТИЧЕСКАЯ ОШИБКА: {e}")
-        logger.error(traceback.format_exc())
+        exit_code = 128 + signal.SIGINT
+    except Exception:
+        logger.exception("\n❌ КРИТИЧЕСКАЯ ОШИБКА")
     finally:
+        session.close()
+        
+        # Удаляем временный аудиофайл сессии
+        if audio_path:
+            try:
+                os.unlink(audio_path)
+            except OSError:
+                pass
+        
+        # Освобождаем аудиоустройство
+        if audio_recorder:
+            audio_recorder.terminate()
+        
         # Закрываем GUI
         if gui:
             try:
                 gui.close()
-            except:
+            except Exception:
                 pass
     
     logger.info("\n🏁 МОДУЛЬ ВОСПРОИЗВЕДЕНИЯ ЗАВЕРШИЛ РАБОТУ")
+    
+    if exit_code:
+        sys.exit(exit_code)
 
 if __name__ == "__main__":
     main()